@@ -4,15 +4,14 @@ import requests
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 from datetime import datetime
+from history_store import history_records
+from results_store import record_predictions
+from slate_ingest import load_slate
 
-# Load datasets
-df = pd.read_csv('rw-prizepicks-predictions-2025-01-29.csv')
+# Load datasets; slate_ingest types the hit rates and strips '@' from team names
+df = load_slate('rw-prizepicks-predictions-2025-01-29.csv')
 injuries_df = pd.read_csv('nba-injury-report.csv')
 
-# Clean team names
-df['Team'] = df['Team'].str.replace('@', '')
-df['Opponent'] = df['Opponent'].str.replace('@', '')
-
 def get_initial_candidates(df, injuries_df):
     healthy_players = df[~df['Player'].isin(injuries_df[injuries_df['Status'].isin(['Out', 'Game Time Decision'])]['Player'])]
     return healthy_players[
@@ -48,14 +47,14 @@ def get_elite_plays(df, injuries_df):
             confidence = calculate_confidence(play)
             play['Confidence'] = confidence
             validated_plays.append(play)
-            store_prediction(play, confidence)
             if len(validated_plays) >= 10:
                 break
     
+    store_predictions(validated_plays)
     return pd.DataFrame(validated_plays).sort_values('Confidence', ascending=False).head(10)
 
-def store_prediction(play, confidence):
-    prediction_data = {
+def prediction_record(play, confidence):
+    return {
         'Date': datetime.now().strftime('%Y-%m-%d'),
         'Player': play['Player'],
         'Market': play['Market Name'],
@@ -72,8 +71,14 @@ def store_prediction(play, confidence):
         'Actual': None,
         'Result': None
     }
-    
-    pd.DataFrame([prediction_data]).to_csv('prediction_history.csv', mode='a', header=False, index=False)
+
+def store_predictions(plays):
+    """
+    Records every validated play in predictions.db in one write
+    """
+    records = [prediction_record(play, play['Confidence']) for play in plays]
+    if records:
+        record_predictions(history_records(pd.DataFrame(records)))
 
 # Display results with all metrics
 print("\n🎯 TOP PREDICTIONS WITH FULL STATISTICAL ANALYSIS")
@@ -2,6 +2,11 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from results_store import query_results
+from season_archive import season_summary
+from rollups import bucket_floor, load_rollup
+import parquet_store
+
 def analyze_performance(predictions_df):
     """
     Analyzes prediction performance metrics
@@ -16,45 +21,91 @@ def analyze_performance(predictions_df):
         'accuracy': accuracy
     }
 
-def analyze_prediction_history():
-    history = pd.read_csv('prediction_history.csv')
-    injury_data = pd.read_csv('nba-injury-report.csv')
-    
+def analyze_tracked_bets(start=None, end=None, from_parquet=False):
+    """
+    Analyzes settled tracked bets between `start` and `end`, reading
+    archived seasons as well as the current one, or only the needed columns
+    of the Parquet snapshot partitions
+    """
+    if from_parquet:
+        bets = parquet_store.load('predictions', ['market', 'result'], start, end)
+    else:
+        bets = query_results(start=start, end=end, include_archived=True)
+    settled = bets[bets['result'] != 'Pending']
+    metrics = analyze_performance(settled)
+
+    print("\n📊 TRACKED BET PERFORMANCE")
+    print("=========================")
+    print(f"{metrics['correct_predictions']} of {metrics['total_predictions']} hit ({metrics['accuracy']:.1f}%)")
+
+    market_stats = settled.groupby('market', observed=True)['result'].agg(['count', lambda r: (r == 'Hit').mean() * 100])
+    market_stats.columns = ['Total Predictions', 'Win Rate']
+    print(market_stats.sort_values('Win Rate', ascending=False))
+
+    archived = pd.DataFrame(season_summary(), columns=['Season', 'Market', 'Bets', 'Hits', 'Misses', 'Avg Hit Rate'])
+    if len(archived) > 0:
+        print("\n🗄️ ARCHIVED SEASONS")
+        print("==================")
+        print(archived.groupby('Season')[['Bets', 'Hits', 'Misses']].sum())
+    return metrics
+
+def win_rate_table(rollup, key_name):
+    table = rollup.rename(columns={'key': key_name, 'bets': 'Total Predictions', 'win_rate': 'Win Rate'})
+    return table.set_index(key_name)[['Total Predictions', 'Win Rate']]
+
+def analyze_prediction_history(high_confidence_floor=60):
+    """
+    Reports settled bet performance from the materialized rollups, so the
+    cost doesn't grow with the number of bets
+    """
     # Market type analysis
     print("\n📊 MARKET PERFORMANCE BREAKDOWN")
     print("=============================")
-    market_stats = history.groupby('Market')['Result'].agg(['count', 'mean'])
-    market_stats.columns = ['Total Predictions', 'Win Rate']
-    market_stats['Win Rate'] = market_stats['Win Rate'] * 100
+    market_stats = win_rate_table(load_rollup('market'), 'Market')
     print(market_stats.sort_values('Win Rate', ascending=False))
     
     # Filter for high probability plays
-    high_confidence = history[
-        (history['Weighted Hit Rate'] > 60) &
-        (history['Hit Rate: Last 5'] > 50) &
-        (history['Hit Rate: Last 10'] > 45)
-    ]
+    by_bucket = load_rollup('market_confidence')
+    market_bucket = by_bucket['key'].str.rsplit('|', n=1, expand=True)
+    high_confidence = by_bucket[market_bucket[1].map(bucket_floor) >= high_confidence_floor]
+    high_confidence = high_confidence.groupby(market_bucket[0].rename('Market'))[['bets', 'hits']].sum()
     
     print("\n🎯 HIGH CONFIDENCE BETS ANALYSIS")
     print("==============================")
-    filtered_stats = high_confidence.groupby('Market')['Result'].agg(['count', 'mean'])
-    filtered_stats.columns = ['Total Predictions', 'Win Rate']
-    filtered_stats['Win Rate'] = filtered_stats['Win Rate'] * 100
+    filtered_stats = pd.DataFrame({
+        'Total Predictions': high_confidence['bets'],
+        'Win Rate': high_confidence['hits'] / high_confidence['bets'] * 100,
+    })
     print(filtered_stats.sort_values('Win Rate', ascending=False))
     
-    # Analyze performance by confidence quartiles
-    print("\n📈 CONFIDENCE QUARTILE PERFORMANCE")
+    # Analyze performance by confidence bucket
+    print("\n📈 CONFIDENCE BUCKET PERFORMANCE")
     print("==============================")
-    confidence_bins = pd.qcut(history['Weighted Hit Rate'], q=4)
-    confidence_analysis = history.groupby(confidence_bins)['Result'].mean() * 100
-    print(confidence_analysis)
+    confidence = load_rollup('confidence')
+    confidence = confidence.iloc[confidence['key'].map(bucket_floor).argsort()]
+    print(win_rate_table(confidence, 'Weighted Hit Rate'))
     
-    # Visualize trends with rolling average
+    # Visualize trends with a 7-day rolling average
+    daily = load_rollup('day').sort_values('key')
+    rolling = daily[['hits', 'bets']].rolling(7, min_periods=1).sum()
     plt.figure(figsize=(12, 6))
-    sns.lineplot(data=history, x='Date', y='Result', rolling=7)
+    sns.lineplot(x=pd.to_datetime(daily['key']), y=rolling['hits'] / rolling['bets'] * 100)
     plt.title('Prediction Accuracy Trend')
     plt.savefig('accuracy_trend.png')
 
 if __name__ == "__main__":
-    analyze_prediction_history()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyze prediction performance")
+    parser.add_argument('--tracked', action='store_true', help="analyze tracked bets in predictions.db")
+    parser.add_argument('--start', help="first date (YYYY-MM-DD) for --tracked")
+    parser.add_argument('--end', help="last date (YYYY-MM-DD) for --tracked")
+    parser.add_argument('--parquet', action='store_true',
+                        help="read --tracked bets from the parquet_store snapshot instead of predictions.db")
+    args = parser.parse_args()
+
+    if args.tracked:
+        analyze_tracked_bets(args.start, args.end, args.parquet)
+    else:
+        analyze_prediction_history()
 
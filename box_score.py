@@ -0,0 +1,153 @@
+"""
+Columnar parsing of ESPN box-score statistics.
+
+Each statistics block ships a header (`keys`, or display `labels`) naming its
+columns. The header is compiled once into a plan mapping source positions to
+a fixed set of base columns, and every athlete in the payload is decoded
+into one int16 matrix, so any stat for any player is a column lookup.
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+COLUMNS = ('MIN', 'FGM', 'FGA', '3PM', '3PA', 'FTM', 'FTA', 'OREB', 'DREB',
+           'REB', 'AST', 'STL', 'BLK', 'TO', 'PF', '+/-', 'PTS')
+COLUMN_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+# ESPN's usual display order, used when a block ships no header at all
+DEFAULT_LABELS = ('MIN', 'FG', '3PT', 'FT', 'OREB', 'DREB', 'REB', 'AST',
+                  'STL', 'BLK', 'TO', 'PF', '+/-', 'PTS')
+
+# Header field (label or key) -> base columns; made-attempted fields fill two
+HEADER_FIELDS = {
+    'MIN': ('MIN',),
+    'minutes': ('MIN',),
+    'FG': ('FGM', 'FGA'),
+    'fieldGoalsMade-fieldGoalsAttempted': ('FGM', 'FGA'),
+    '3PT': ('3PM', '3PA'),
+    'threePointFieldGoalsMade-threePointFieldGoalsAttempted': ('3PM', '3PA'),
+    'FT': ('FTM', 'FTA'),
+    'freeThrowsMade-freeThrowsAttempted': ('FTM', 'FTA'),
+    'OREB': ('OREB',),
+    'offensiveRebounds': ('OREB',),
+    'DREB': ('DREB',),
+    'defensiveRebounds': ('DREB',),
+    'REB': ('REB',),
+    'rebounds': ('REB',),
+    'AST': ('AST',),
+    'assists': ('AST',),
+    'STL': ('STL',),
+    'steals': ('STL',),
+    'BLK': ('BLK',),
+    'blocks': ('BLK',),
+    'TO': ('TO',),
+    'turnovers': ('TO',),
+    'PF': ('PF',),
+    'fouls': ('PF',),
+    '+/-': ('+/-',),
+    'plusMinus': ('+/-',),
+    'PTS': ('PTS',),
+    'points': ('PTS',),
+}
+
+MAX_PARSED = 64
+
+_parsed = OrderedDict()  # id(payload) -> (payload, BoxScore)
+_parsed_lock = threading.Lock()
+
+
+@lru_cache(maxsize=32)
+def compile_header(header):
+    """
+    Compiles a statistics block header into ((position, column indices), ...)
+    """
+    plan = []
+    for position, field in enumerate(header):
+        targets = HEADER_FIELDS.get(field)
+        if targets:
+            plan.append((position, tuple(COLUMN_INDEX[target] for target in targets)))
+    return tuple(plan)
+
+
+def _parse_int(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return 0
+
+
+class BoxScore:
+    """
+    All athletes of one game as an int16 matrix with one row per athlete and
+    one column per entry in COLUMNS.
+    """
+
+    def __init__(self, athlete_ids, names, teams, matrix):
+        self.athlete_ids = athlete_ids
+        self.names = names
+        self.teams = teams
+        self.matrix = matrix
+        self.rows = {athlete_id: i for i, athlete_id in enumerate(athlete_ids)}
+
+    def __len__(self):
+        return len(self.athlete_ids)
+
+    def stat_lines(self):
+        """Returns {athlete_id: (name, team, {column: value})} for every athlete"""
+        return {
+            athlete_id: (name, team, dict(zip(COLUMNS, values)))
+            for athlete_id, name, team, values in zip(self.athlete_ids, self.names, self.teams,
+                                                      self.matrix.tolist())
+        }
+
+
+def _parse(summary):
+    athlete_ids, names, teams, rows = [], [], [], []
+    for team in summary.get('boxscore', {}).get('players', []):
+        abbreviation = team.get('team', {}).get('abbreviation')
+        for block in team.get('statistics', []):
+            plan = compile_header(tuple(block.get('keys') or block.get('labels') or DEFAULT_LABELS))
+            for athlete in block.get('athletes', []):
+                info = athlete.get('athlete', {})
+                stats = athlete.get('stats')
+                if not info.get('id') or not stats:
+                    continue
+                row = [0] * len(COLUMNS)
+                for position, targets in plan:
+                    if position >= len(stats):
+                        continue
+                    if len(targets) == 2:
+                        made, _, attempted = str(stats[position]).partition('-')
+                        row[targets[0]] = _parse_int(made)
+                        row[targets[1]] = _parse_int(attempted)
+                    else:
+                        row[targets[0]] = _parse_int(stats[position])
+                athlete_ids.append(str(info['id']))
+                names.append(info.get('displayName'))
+                teams.append(abbreviation)
+                rows.append(row)
+
+    matrix = np.array(rows, dtype=np.int16).reshape(len(rows), len(COLUMNS))
+    return BoxScore(athlete_ids, names, teams, matrix)
+
+
+def parse_box_score(summary):
+    """
+    Decodes a summary payload into a BoxScore. Payloads are memoized by
+    identity, so the cached payloads espn_api hands out are parsed once.
+    """
+    key = id(summary)
+    with _parsed_lock:
+        entry = _parsed.get(key)
+        if entry is not None and entry[0] is summary:
+            _parsed.move_to_end(key)
+            return entry[1]
+
+    box_score = _parse(summary)
+    with _parsed_lock:
+        _parsed[key] = (summary, box_score)
+        while len(_parsed) > MAX_PARSED:
+            _parsed.popitem(last=False)
+    return box_score
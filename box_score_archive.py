@@ -0,0 +1,161 @@
+"""
+On-disk archive of raw ESPN payloads.
+
+Final payloads are stored gzip-compressed and content-addressed under
+espn_archive/objects/, with a small pointer file per scoreboard date, game
+(event id) and roster. Pointers for finished games are frozen, so a
+game's final box score is downloaded once and then served from disk forever.
+Until then each key keeps a single live snapshot that every poll
+overwrites, so the archive only grows with finished games.
+espn_api can also run in replay mode, serving every request from the archive
+so settlement and historical views work offline and can be benchmarked
+against recorded slates:
+
+    python box_score_archive.py list
+    python box_score_archive.py bench 2025-01-29 2025-01-30
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+
+import requests
+
+ARCHIVE_DIR = os.environ.get('ESPN_ARCHIVE_DIR', 'espn_archive')
+KINDS = ('scoreboard', 'summary', 'roster')
+
+
+class ArchiveMiss(requests.exceptions.RequestException):
+    """Raised in replay mode when a payload was never recorded"""
+
+
+def _atomic_write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _object_path(digest):
+    return os.path.join(ARCHIVE_DIR, 'objects', digest[:2], f'{digest}.json.gz')
+
+
+def _pointer_path(kind, key):
+    return os.path.join(ARCHIVE_DIR, kind, f'{key}.json')
+
+
+def _live_path(kind, key):
+    return os.path.join(ARCHIVE_DIR, kind, f'{key}.live.json.gz')
+
+
+def _read_pointer(kind, key):
+    try:
+        with open(_pointer_path(kind, key)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store(kind, key, payload, final=False):
+    """
+    Archives `payload` under (kind, key) and returns its content hash.
+
+    A final payload is kept for good and its pointer is never replaced; a
+    non-final one only overwrites the key's live snapshot.
+    """
+    pointer = _read_pointer(kind, key)
+    if pointer is not None and pointer.get('final'):
+        return pointer['sha256']
+
+    raw = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()
+    digest = hashlib.sha256(raw).hexdigest()
+    if not final:
+        _atomic_write(_live_path(kind, key), gzip.compress(raw))
+        return digest
+
+    path = _object_path(digest)
+    if not os.path.exists(path):
+        _atomic_write(path, gzip.compress(raw))
+    _atomic_write(_pointer_path(kind, key), json.dumps({
+        'sha256': digest,
+        'final': True,
+        'archived_at': datetime.now().isoformat(timespec='seconds'),
+    }).encode())
+    try:
+        os.remove(_live_path(kind, key))
+    except OSError:
+        pass
+    return digest
+
+
+def load(kind, key, final_only=False):
+    """Returns the archived payload for (kind, key), or None"""
+    pointer = _read_pointer(kind, key)
+    if pointer is not None and pointer.get('final'):
+        path = _object_path(pointer['sha256'])
+    elif final_only:
+        return None
+    else:
+        path = _live_path(kind, key)
+    try:
+        with gzip.open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def archived_keys(kind):
+    """Lists every key archived for `kind`"""
+    directory = os.path.join(ARCHIVE_DIR, kind)
+    if not os.path.isdir(directory):
+        return []
+    keys = set()
+    for name in os.listdir(directory):
+        for suffix in ('.live.json.gz', '.json'):
+            if name.endswith(suffix):
+                keys.add(name[:-len(suffix)])
+                break
+    return sorted(keys)
+
+
+def benchmark(dates):
+    """Times a full stat-line collection for each recorded date in replay mode"""
+    import time
+    import espn_api
+    from settlement import collect_stat_lines
+
+    espn_api.set_replay_mode(True)
+    for game_date in dates:
+        # collect_stat_lines turns request errors, ArchiveMiss included, into no stat lines
+        if load('scoreboard', game_date.replace('-', '')) is None:
+            print(f"{game_date}: not archived")
+            continue
+        espn_api.clear_cache()
+        start = time.perf_counter()
+        stat_lines = collect_stat_lines(game_date)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{game_date}: {len(stat_lines)} stat lines in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or replay the ESPN payload archive")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="list archived scoreboard dates and games")
+    bench_parser = subparsers.add_parser('bench', help="time settlement input collection from the archive")
+    bench_parser.add_argument('dates', nargs='+', help="game dates (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for kind in KINDS:
+            keys = archived_keys(kind)
+            print(f"{kind}: {len(keys)} archived")
+            if kind == 'scoreboard':
+                for key in keys:
+                    print(f"  {key}")
+    else:
+        benchmark(args.dates)
@@ -0,0 +1,31 @@
+"""
+Cheap change notifications for the dashboard.
+
+Every channel has a monotonically increasing version in predictions.db:
+'predictions' is the change counter the predictions triggers bump on every
+insert, update and delete, and 'stats' is bumped by the stats collector
+whenever it writes new box-score snapshots. Reading all of them is one tiny
+query, so the dashboard can poll every few seconds and only redo the work
+whose inputs actually moved.
+"""
+from database import DB_PATH, connection
+from migrations import migrate
+
+CHANNELS = ('predictions', 'stats')
+
+
+def bump(conn, channel):
+    """Advances `channel`'s version inside the caller's transaction"""
+    conn.execute('UPDATE data_versions SET version = version + 1 WHERE channel = ?', (channel,))
+
+
+def data_versions(path=None):
+    """Returns {channel: version} for every channel"""
+    path = path or DB_PATH
+    migrate(path)
+    with connection(path) as conn:
+        row = conn.execute('''
+            SELECT (SELECT value FROM change_counter WHERE id = 1),
+                   (SELECT version FROM data_versions WHERE channel = 'stats')
+        ''').fetchone()
+    return {channel: version or 0 for channel, version in zip(CHANNELS, row)}
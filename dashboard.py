@@ -3,16 +3,47 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
-import sqlite3
 import requests
 from time import sleep
-import threading
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import numpy as np
 from optimize_analysis import optimized_analysis
+from database import transaction
+from migrations import migrate
+from results_store import load_results, query_results, todays_results, record_predictions
+from season_archive import season_summary
+from rollups import totals
+from parquet_store import snapshot_slate
+from slate_ingest import OUTCOMES_COLUMN, load_slate
+from outcome_features import encode_outcomes, outcome_list
+from write_queue import queue_stats
+from change_feed import data_versions
+from espn_api import get_scoreboard, get_summary, get_summaries, cache_stats
+from settlement import settle_date, game_stat_lines, player_stat_line
+from markets import market_value, UnknownMarketError
+from player_index import lookup_players
+from stats_collector import load_stat_lines, last_snapshot_time
 from pytz import timezone
 
+# Seconds between checks of the data version counters
+CHANGE_POLL_SECONDS = 5
+
+# Best-bets column -> predictions column; tracked bets keep the features train_model learns from
+TRACKED_COLUMNS = {
+    'Date': 'date',
+    'Player': 'player',
+    'Market Name': 'market',
+    'Line': 'line',
+    'Weighted Hit Rate': 'hit_rate',
+    'Hit Rate: Last 5': 'hit_rate_last_5',
+    'Hit Rate: Last 10': 'hit_rate_last_10',
+    'Hit Rate: Last 20': 'hit_rate_last_20',
+    'Hit Rate: Season': 'hit_rate_season',
+    'Hit Rate: Vs Opponent': 'hit_rate_vs_opponent',
+    OUTCOMES_COLUMN: 'last_20_outcomes',
+}
+
 st.set_page_config(
     layout="wide",
     page_title="PrizePicks Analysis Dashboard",
@@ -26,77 +57,33 @@ def load_data():
 
 def filter_todays_best_bets(df):
     today = datetime.now().strftime('%Y-%m-%d')
-    
-    # Convert hit rate columns to numeric values
-    df['Weighted Hit Rate'] = pd.to_numeric(df['Weighted Hit Rate'])
-    df['Hit Rate: Last 5'] = pd.to_numeric(df['Hit Rate: Last 5'])
-    df['Hit Rate: Season'] = pd.to_numeric(df['Hit Rate: Season'])
-
+    # Hit rates arrive numeric from slate_ingest
     return df[
         (df['Date'] == today) &
         (df['Weighted Hit Rate'] > 60) &
-        (df['Hit Rate: Last 5'] > 40) &
-        (df['Hit Rate: Season'] > 45)
+        (df['Hit Rate: Last 5'] > 50)
     ].sort_values('Weighted Hit Rate', ascending=False)
 
 
 def initialize_database():
-    conn = sqlite3.connect('predictions.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS predictions (
-            id INTEGER PRIMARY KEY,
-            date TEXT,
-            player TEXT,
-            market TEXT,
-            line REAL,
-            prediction TEXT,
-            result TEXT DEFAULT 'Pending',
-            hit_rate REAL,
-            final_value REAL
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    migrate()
 
 
-def save_prediction(prediction):
-    conn = sqlite3.connect('predictions.db')
-    data = pd.DataFrame({
-        'date': [prediction['Date']],
-        'player': [prediction['Player']],
-        'market': [prediction['Market Name']],
-        'line': [prediction['Line']],
-        'prediction': ['Over'],
-        'result': ['Pending'],
-        'hit_rate': [prediction['Weighted Hit Rate']]
-    })
-    data.to_sql('predictions', conn, if_exists='append', index=False)
-    conn.close()
-
-def load_results():
-    conn = sqlite3.connect('predictions.db')
-    results = pd.read_sql('SELECT * FROM predictions', conn)
-    conn.close()
-    return results
-
-def update_result(prediction_id, result):
-    conn = sqlite3.connect('predictions.db')
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE predictions SET result = ? WHERE id = ?",
-        (result, prediction_id)
-    )
-    conn.commit()
-    conn.close()
+def save_predictions(bets):
+    """
+    Tracks every row of a best-bets DataFrame as an Over, with the hit rates
+    it was picked on, in one write and returns how many were new
+    """
+    columns = [column for column in TRACKED_COLUMNS if column in bets.columns]
+    records = bets[columns].rename(columns=TRACKED_COLUMNS).assign(prediction='Over')
+    records['line'] = records['line'].astype(float)
+    records = records.astype(object).where(records.notna(), None)
+    return record_predictions(records.to_dict('records'))
 
-def filter_todays_best_bets(df):
-    today = datetime.now().strftime('%Y-%m-%d')
-    return df[
-        (df['Date'] == today) &
-        (df['Weighted Hit Rate'] > 60) &
-        (df['Hit Rate: Last 5'] > 50)
-    ].sort_values('Weighted Hit Rate', ascending=False)
+
+def save_prediction(prediction):
+    """Tracks a bet; returns False if it was already being tracked"""
+    return save_predictions(prediction.to_frame().T) > 0
 
 def metrics_display(df, col1, col2, col3, col4):
     with col1:
@@ -121,17 +108,18 @@ def market_analysis(df):
         col1, col2 = st.columns(2)
         with col1:
             market_counts = df['Market Name'].value_counts()
+            market_counts = market_counts[market_counts > 0]
             fig1 = px.bar(market_counts, title="Predictions by Market Type")
             st.plotly_chart(fig1)
         with col2:
-            market_hit_rates = df.groupby('Market Name')['Weighted Hit Rate'].mean()
+            market_hit_rates = df.groupby('Market Name', observed=True)['Weighted Hit Rate'].mean()
             fig2 = px.bar(market_hit_rates, title="Hit Rates by Market Type")
             st.plotly_chart(fig2)
 
 def player_performance(df):
     st.header("Player Performance")
     if 'Player' in df.columns:
-        top_players = df.groupby('Player')['Weighted Hit Rate'].mean().sort_values(ascending=False).head(10)
+        top_players = df.groupby('Player', observed=True)['Weighted Hit Rate'].mean().sort_values(ascending=False).head(10)
         fig3 = px.bar(top_players, title="Top 10 Players by Hit Rate")
         st.plotly_chart(fig3)
 
@@ -156,32 +144,9 @@ def sync_completed_game_stats(game_data, boxscore):
     if period == 4 and ':' in clock:
         minutes, seconds = clock.split(':')
         if int(minutes) == 0 and 0 <= int(seconds) <= 30:
-            conn = sqlite3.connect('predictions.db')
-            cursor = conn.cursor()
-            
-            # Get all tracked bets for this game
+            # One pass over every game's box score settles all tracked bets
             game_date = datetime.now().strftime('%Y-%m-%d')
-            cursor.execute("""
-                SELECT id, player, market, line 
-                FROM predictions 
-                WHERE date = ? AND result = 'Pending'
-            """, (game_date,))
-            
-            active_bets = cursor.fetchall()
-            
-            # Process final stats for each tracked player
-            for bet_id, player, market, line in active_bets:
-                final_stat = get_espn_stats(player, market)
-                if final_stat:
-                    result = 'Hit' if final_stat >= float(line) else 'Miss'
-                    cursor.execute("""
-                        UPDATE predictions 
-                        SET result = ? 
-                        WHERE id = ?
-                    """, (result, bet_id))
-            
-            conn.commit()
-            conn.close()
+            settle_date(game_date)
 
 
 
@@ -209,8 +174,8 @@ def trend_analysis(df):
         )
         
         player_data = df[df['Player'] == selected_player]
-        outcomes_str = str(player_data['Hit Rate: Last 20 Outcomes'].iloc[0])
-        outcomes_list = [int(x) for x in outcomes_str if x in '01']
+        bits, lengths = encode_outcomes(player_data['Hit Rate: Last 20 Outcomes'].iloc[:1])
+        outcomes_list = outcome_list(bits[0], lengths[0])
         
         trend_data = pd.DataFrame({
             'Game': range(1, len(outcomes_list) + 1),
@@ -223,172 +188,50 @@ def trend_analysis(df):
         st.plotly_chart(fig6)
 
 
-def get_espn_stats(player_name, market_type, line, bet_date=None):
+def get_espn_stats(player_name, market_type, line=None, bet_date=None):
     """
-    Fetches and processes ESPN stats with targeted debugging
+    Returns the player's current value for a market from the stats collector's
+    latest box-score snapshot.
     """
-    def safe_get_stat(stats_array, index, default=0):
-        try:
-            return int(stats_array[index]) if stats_array[index] else default
-        except (IndexError, ValueError, TypeError):
-            return default
-
-    today = datetime.now().strftime('%Y-%m-%d')
-    url = "http://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard"
+    game_date = bet_date or datetime.now().strftime('%Y-%m-%d')
+    stat_lines = load_stat_lines(game_date)
+    if not stat_lines:
+        return 0
     
-    try:
-        games_data = requests.get(url, timeout=10).json().get('events', [])
-        active_games = []
-        completed_games = []
-        
-        for game in games_data:
-            utc_time = datetime.strptime(game['date'], '%Y-%m-%dT%H:%M%z')
-            et_time = utc_time.astimezone(timezone('US/Eastern'))
-            game_time = et_time.strftime('%I:%M %p ET')
-            
-            game_info = {
-                'id': game['id'],
-                'name': game['name'],
-                'time': game_time,
-                'status': game['status']['type']['state'],
-                'period': game.get('status', {}).get('period', 0),
-                'clock': game.get('status', {}).get('displayClock', '')
-            }
-            
-            if game_info['status'] == 'in':
-                active_games.append(game_info)
-            elif game_info['status'] == 'post':
-                completed_games.append(game_info)
-
-        # Check completed games first
-        for game in completed_games + active_games:
-            box_score_url = f"https://site.api.espn.com/apis/site/v2/sports/basketball/nba/summary?event={game['id']}"
-            
-            try:
-                response = requests.get(box_score_url, timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    boxscore = data.get('boxscore', {})
-                    
-                    for team in boxscore.get('players', []):
-                        team_name = team.get('team', {}).get('name')
-                        
-                        for stats in team.get('statistics', []):
-                            for athlete in stats.get('athletes', []):
-                                if player_name.lower() in athlete['athlete']['displayName'].lower():
-                                    player_stats = athlete['stats']
-                                    
-                                    processed_stats = {
-                                        'Minutes': safe_get_stat(player_stats, 0),
-                                        'Points': safe_get_stat(player_stats, 13),
-                                        'Rebounds': safe_get_stat(player_stats, 6),
-                                        'Assists': safe_get_stat(player_stats, 7),
-                                        'Blocks': safe_get_stat(player_stats, 8),
-                                        'Steals': safe_get_stat(player_stats, 9),
-                                        'ThreesMade': safe_get_stat(player_stats, 11)
-                                    }
-                                    
-                                    final_stats = process_market_stats(processed_stats, market_type)
-                                    
-                    # Update database if game is complete
-                    if game['status'] == 'post':
-                        conn = sqlite3.connect('predictions.db')
-                        cursor = conn.cursor()
-                        
-                        # First get the line value for this prediction
-                        cursor.execute("""
-                            SELECT line 
-                            FROM predictions 
-                            WHERE player = ? AND market = ? AND date = ? AND result = 'Pending'
-                        """, (player_name, market_type, today))
-                        
-                        line_result = cursor.fetchone()
-                        if line_result:
-                            line = line_result[0]
-                            # Now update with the result
-                            cursor.execute("""
-                                UPDATE predictions 
-                                SET result = ?, actual = ?
-                                WHERE player = ? AND market = ? AND date = ? AND result = 'Pending'
-                            """, ('Hit' if final_stats > line else 'Miss', final_stats, player_name, market_type, today))
-                            conn.commit()
-                        conn.close()
-                        return final_stats
-                                    
-            except (requests.exceptions.RequestException, ValueError, KeyError):
-                continue
-
-    except requests.exceptions.RequestException:
+    players = lookup_players([player_name], active_ids=set(stat_lines))
+    entry = stat_lines.get(players['resolved'].get(player_name))
+    if entry is None:
         return 0
-
-    return 0
-
-
-
-
-
-
-
-
-
-
+    try:
+        return market_value(entry['stats'], market_type)
+    except UnknownMarketError as e:
+        st.error(str(e))
+        return None
 
 
 def check_live_stats(player_name, market_type):
-    url = "http://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard"
-    response = requests.get(url).json()
-    
-    for game in response.get('events', []):
-        if game['status']['type']['state'] == 'in':
-            game_id = game['id']
-            stats = fetch_live_game_stats(game_id, player_name, market_type)
-            if stats:
-                return stats
+    response = get_scoreboard()
+    
+    live_ids = [game['id'] for game in response.get('events', [])
+                if game['status']['type']['state'] == 'in']
+    # Warm the cache for every live game at once before scanning them
+    get_summaries((game_id, 'in') for game_id in live_ids)
+    for game_id in live_ids:
+        stats = fetch_live_game_stats(game_id, player_name, market_type)
+        if stats:
+            return stats
     return None
 
 def fetch_live_game_stats(game_id, player_name, market_type):
     """
     Fetches live game statistics for a specific player
     """
-    url = f"http://site.api.espn.com/apis/site/v2/sports/basketball/nba/summary?event={game_id}"
-    response = requests.get(url).json()
-    
-    for team in response.get('boxscore', {}).get('players', []):
-        for player in team.get('statistics', []):
-            if player_name.lower() in player.get('name', '').lower():
-                stats = {
-                    'Points': player.get('points', 0),
-                    'Rebounds': player.get('rebounds', 0),
-                    'Assists': player.get('assists', 0),
-                    'Steals': player.get('steals', 0),
-                    'Blocks': player.get('blocks', 0)
-                }
-                
-                return process_market_stats(stats, market_type)
-    
-    return None
-
-def extract_stats_from_row(row, market_type):
-    """
-    Extracts and processes stats from a player's box score row
-    """
-    stats = {}
-    stat_cells = row.find_all('td')
-    
-    if len(stat_cells) >= 14:  # Standard box score has 14+ columns
-        stats['Points'] = int(stat_cells[13].text)
-        stats['Rebounds'] = int(stat_cells[6].text)
-        stats['Assists'] = int(stat_cells[7].text)
-        
-        # Calculate combined stats
-        stats['PTS+REB'] = stats['Points'] + stats['Rebounds']
-        stats['PTS+AST'] = stats['Points'] + stats['Assists']
-        stats['REB+AST'] = stats['Rebounds'] + stats['Assists']
-        stats['PTS+REB+AST'] = stats['Points'] + stats['Rebounds'] + stats['Assists']
-        
-        return stats.get(market_type, None)
+    response = get_summary(game_id, 'in')
+    entry = player_stat_line(player_name, game_stat_lines(response, 'in', game_id))
     
-    return None
+    if entry is None:
+        return None
+    return market_value(entry['stats'], market_type)
 
 def get_game_timing():
     return {
@@ -401,120 +244,8 @@ def get_game_timing():
     }
 
 
-def check_completed_stats(player_name, market_type, game_date):
-    today = datetime.now().strftime('%Y-%m-%d')
-    
-    if 'tracking_cache' not in st.session_state:
-        st.session_state.tracking_cache = {}
-    
-    cache_key = f"{player_name}_{game_date}"
-    url = f"https://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard?dates={game_date}"
-    data = requests.get(url).json()
-    games = data.get('events', [])
-    
-    # Debug prints
-    st.write("🔍 DEBUG INFO:")
-    st.write(f"Date being checked: {game_date}")
-    st.write(f"Games found: {len(games)}")
-    st.write(f"Player being tracked: {player_name}")
-    
-    player_data = {
-        'name': player_name,
-        'market': market_type,
-        'games': [],
-        'current_value': 0,
-        'stats': {
-            'Points': 0,
-            'Rebounds': 0,
-            'Assists': 0,
-            'Steals': 0,
-            'Blocks': 0,
-            'Minutes': '0',
-            'FG': '0-0',
-            '3PT': '0-0'
-        }
-    }
-    
-    for game in games:
-        game_id = game['id']
-        game_status = game.get('status', {}).get('type', {}).get('state', '')
-        period = game.get('status', {}).get('period', 1)
-        clock = game.get('status', {}).get('displayClock', '')
-        
-        # Debug game status
-        st.write(f"Game {game_id}:")
-        st.write(f"- Status: {game_status}")
-        st.write(f"- Period: {period}")
-        st.write(f"- Clock: {clock}")
-        
-        if game_status in ['in', 'post']:
-            box_score_url = f"https://site.api.espn.com/apis/site/v2/sports/basketball/nba/summary?event={game_id}"
-            st.write(f"📊 Fetching box score from: {box_score_url}")
-            box_score = requests.get(box_score_url).json()
-            
-            for team in box_score.get('boxscore', {}).get('teams', []):
-                for player in team.get('statistics', []):
-                    if player_name.lower() in player.get('athlete', {}).get('displayName', '').lower():
-                        st.write(f"✅ Found {player_name}'s stats")
-                        stats_array = player.get('stats', [])
-                        if stats_array:
-                            player_data['stats'] = {
-                                'Points': int(stats_array[0]) if len(stats_array) > 0 else 0,
-                                'Rebounds': int(stats_array[5]) if len(stats_array) > 5 else 0,
-                                'Assists': int(stats_array[6]) if len(stats_array) > 6 else 0,
-                                'Steals': int(stats_array[7]) if len(stats_array) > 7 else 0,
-                                'Blocks': int(stats_array[8]) if len(stats_array) > 8 else 0,
-                                'Minutes': stats_array[1] if len(stats_array) > 1 else '0',
-                                'FG': f"{stats_array[2]}-{stats_array[3]}" if len(stats_array) > 3 else '0-0',
-                                '3PT': f"{stats_array[4]}-{stats_array[5]}" if len(stats_array) > 5 else '0-0'
-                            }
-                            
-                            # Market type calculations
-                            if market_type == 'Points':
-                                player_data['current_value'] = player_data['stats']['Points']
-                            elif market_type == 'Rebounds':
-                                player_data['current_value'] = player_data['stats']['Rebounds']
-                            elif market_type == 'Assists':
-                                player_data['current_value'] = player_data['stats']['Assists']
-                            elif market_type == 'PTS+REB':
-                                player_data['current_value'] = player_data['stats']['Points'] + player_data['stats']['Rebounds']
-                            elif market_type == 'PTS+AST':
-                                player_data['current_value'] = player_data['stats']['Points'] + player_data['stats']['Assists']
-                            elif market_type == 'REB+AST':
-                                player_data['current_value'] = player_data['stats']['Rebounds'] + player_data['stats']['Assists']
-                            elif market_type == 'PTS+REB+AST':
-                                player_data['current_value'] = player_data['stats']['Points'] + player_data['stats']['Rebounds'] + player_data['stats']['Assists']
-        
-        game_info = {
-            'id': game_id,
-            'status': game_status,
-            'teams': [team.get('team', {}).get('name') for team in game.get('competitions', [])[0].get('competitors', [])],
-            'time': clock,
-            'period': period,
-            'quarter': f"Q{period}" if period <= 4 else "OT" if period > 4 else "",
-            'display_period': f"{'Q' if period <= 4 else 'OT'}{period if period <= 4 else period-4} - {clock}"
-        }
-        player_data['games'].append(game_info)
-    
-    st.session_state.tracking_cache[cache_key] = player_data
-    
-    if game_date == today:
-        st.sidebar.write(f"📊 Stats Updated: {player_data['stats']}")
-    
-    return player_data
-
-
-
-
-
-
-
-
-
-
 def get_game_status(game_id):
-    url = f"https://site.api.espn.com/apis/site/v2/sports/basketball/nba/summary?event={game_id}"
-    response = requests.get(url).json()
+    response = get_summary(game_id)
     return {
         'status': response.get('status', {}).get('type', {}).get('state', ''),
         'period': response.get('status', {}).get('period', 0),
@@ -523,106 +254,11 @@ def get_game_status(game_id):
 
 
 
-def process_stats(stats_row, market_type):
-    stat_indices = {
-        'MIN': 0, 'FG': 1, '3PT': 2, 'FT': 3,
-        'OREB': 4, 'DREB': 5, 'REB': 6, 'AST': 7,
-        'STL': 8, 'BLK': 9, 'TO': 10, 'PF': 11,
-        '+/-': 12, 'PTS': 13
-    }
-
-    fg = stats_row[stat_indices['FG']].text.split('-')
-    pt3 = stats_row[stat_indices['3PT']].text.split('-')
-    ft = stats_row[stat_indices['FT']].text.split('-')
-    
-    base_stats = {
-        'Points': int(stats_row[stat_indices['PTS']].text),
-        'Rebounds': int(stats_row[stat_indices['REB']].text),
-        'Assists': int(stats_row[stat_indices['AST']].text),
-        'Steals': int(stats_row[stat_indices['STL']].text),
-        'Blocks': int(stats_row[stat_indices['BLK']].text),
-        'Minutes': int(stats_row[stat_indices['MIN']].text),
-        'OffReb': int(stats_row[stat_indices['OREB']].text),
-        'DefReb': int(stats_row[stat_indices['DREB']].text),
-        'Turnovers': int(stats_row[stat_indices['TO']].text)
-    }
-    
-    shooting_stats = {
-        'FGM': int(fg[0]), 'FGA': int(fg[1]),
-        '3PM': int(pt3[0]), '3PA': int(pt3[1]),
-        'FTM': int(ft[0]), 'FTA': int(ft[1])
-    }
-    
-    combined_stats = {
-        **base_stats,
-        **shooting_stats,
-        'PTS+REB': base_stats['Points'] + base_stats['Rebounds'],
-        'PTS+AST': base_stats['Points'] + base_stats['Assists'],
-        'REB+AST': base_stats['Rebounds'] + base_stats['Assists'],
-        'PTS+REB+AST': base_stats['Points'] + base_stats['Rebounds'] + base_stats['Assists'],
-        'STL+BLK': base_stats['Steals'] + base_stats['Blocks'],
-        'BLK+STL': base_stats['Blocks'] + base_stats['Steals'],
-        '3PT Made': shooting_stats['3PM']
-    }
-    
-    st.sidebar.write("Stats found:", combined_stats)
-    return combined_stats.get(market_type, 0)
-
-
-def process_market_stats(stats, market_type):
-    """Helper function to calculate combined stats"""
-    market_stats = {
-        'Points': stats['Points'],
-        'Rebounds': stats['Rebounds'],
-        'Assists': stats['Assists'],
-        'PTS+REB': stats['Points'] + stats['Rebounds'],
-        'PTS+AST': stats['Points'] + stats['Assists'],
-        'REB+AST': stats['Rebounds'] + stats['Assists'],
-        'PTS+REB+AST': stats['Points'] + stats['Rebounds'] + stats['Assists']
-    }
-    return market_stats.get(market_type, 0)
-    
-def process_market_stats(stats, market_type):
-    """
-    Processes raw stats into market-specific values
-    """
-    market_calculations = {
-        'Points': stats['Points'],
-        'Rebounds': stats['Rebounds'],
-        'Assists': stats['Assists'],
-        'PTS+REB': stats['Points'] + stats['Rebounds'],
-        'PTS+AST': stats['Points'] + stats['Assists'],
-        'REB+AST': stats['Rebounds'] + stats['Assists'],
-        'PTS+REB+AST': stats['Points'] + stats['Rebounds'] + stats['Assists']
-    }
-    return market_calculations.get(market_type, 0)
-
-def process_player_stats(stats_data, market_type):
-    """
-    Processes raw ESPN stats data into usable metrics
-    """
-    stats_mapping = {
-        'Points': 'points',
-        'Rebounds': 'rebounds',
-        'Assists': 'assists',
-        'PTS+REB': lambda x: x['points'] + x['rebounds'],
-        'PTS+AST': lambda x: x['points'] + x['assists'],
-        'REB+AST': lambda x: x['rebounds'] + x['assists'],
-        'PTS+REB+AST': lambda x: x['points'] + x['rebounds'] + x['assists'],
-        'Steals': 'steals',
-        'Blocks': 'blocks',
-        'BLK+STL': lambda x: x['blocks'] + x['steals']
-    }
-    
-    return stats_mapping[market_type](stats_data) if market_type in stats_mapping else None
-
 def get_live_game_stats():
     """
     Fetches all live NBA game stats
     """
-    url = "http://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard"
-    response = requests.get(url)
-    return response.json()
+    return get_scoreboard()
 
 def update_dashboard_stats():
     """
@@ -633,29 +269,6 @@ def update_dashboard_stats():
         st.session_state.live_stats = live_stats
         sleep(60)
 
-def validate_stats_data(stats_array):
-    """Validates the stats array structure"""
-    if not stats_array:
-        return False
-    
-    required_indices = [0, 5, 6, 7, 8]  # Points, Rebounds, Assists, Steals, Blocks
-    return all(i < len(stats_array) for i in required_indices)
-
-
-def auto_validate_predictions():
-    results = load_results()
-    updated = False
-    
-    for idx, pred in results.iterrows():
-        if pred['result'] == 'Pending':
-            actual_stat = get_espn_stats(pred['player'], pred['market'])
-            if actual_stat > 0:
-                result = 'Hit' if actual_stat >= float(pred['line']) else 'Miss'
-                update_result(idx, result)
-                updated = True
-    
-    if updated:
-        st.rerun()
 def process_live_updates(player_name, market_type, line, prediction):
     """
     Processes live stat updates and returns current progress
@@ -690,7 +303,7 @@ def display_tracking_section():
     today = datetime.now().strftime('%Y-%m-%d')
     
     # Split into today's and historical bets
-    todays_bets = results[results['date'] == today]
+    todays_bets = todays_results()
     historical_bets = results[results['date'] != today]
     
     if len(todays_bets) > 0:
@@ -703,15 +316,16 @@ def display_tracking_section():
         for idx, bet in historical_bets.iterrows():
             display_bet_card(bet)
 
-def display_live_bet_card(bet):
+def display_live_bet_card(bet, stats_data=None):
     st.write("🔍 DEBUG: Live Bet Card Data")
     st.write("Incoming bet data:", bet)
     
     today = datetime.now().strftime('%Y-%m-%d')
     
     if bet['date'] == today:
-        st.write("\n📊 Fetching live stats...")
-        stats_data = get_espn_stats(bet['player'], bet['market'])
+        if stats_data is None:
+            st.write("\n📊 Fetching live stats...")
+            stats_data = get_espn_stats(bet['player'], bet['market'])
         st.write("Raw stats response:", stats_data)
         
         with st.container():
@@ -793,64 +407,58 @@ def delete_bet(bet_id):
     """
     Deletes a bet from the tracking database
     """
-    conn = sqlite3.connect('predictions.db')
-    cursor = conn.cursor()
-    
-    # First verify the bet exists
-    cursor.execute('SELECT id FROM predictions WHERE id = ?', (bet_id,))
-    if cursor.fetchone():
-        # Delete the bet
-        cursor.execute('DELETE FROM predictions WHERE id = ?', (bet_id,))
-        conn.commit()
-        st.session_state.prediction_data = pd.read_sql('SELECT * FROM predictions', conn)
-    
-    conn.close()
+    with transaction() as conn:
+        # First verify the bet exists
+        deleted = conn.execute('SELECT id FROM predictions WHERE id = ?', (bet_id,)).fetchone()
+        if deleted:
+            # Delete the bet
+            conn.execute('DELETE FROM predictions WHERE id = ?', (bet_id,))
+
+    if deleted:
+        st.session_state.prediction_data = load_results()
     return True
 
 
 
 def display_bet_card(bet):
+    """
+    Renders a past bet from its stored actual/result columns; no stats are fetched
+    """
     with st.expander(f"{bet['player']} - {bet['market']}", expanded=True):
         col1, col2, col3 = st.columns([2,1,1])
         
-        # Get live game data
-        stats_data = check_completed_stats(bet['player'], bet['market'], bet['date'])
+        actual = bet.get('actual')
+        current_value = None if pd.isna(actual) else float(actual)
         
         with col1:
-            current_value = stats_data['current_value'] if stats_data else None
             if current_value is not None:
-                progress = (float(current_value) / float(bet['line'])) * 100
+                progress = (current_value / float(bet['line'])) * 100
                 st.progress(min(progress/100, 1.0))
                 st.metric(
-                    "Current Progress",
-                    f"{current_value}",
+                    "Final Value",
+                    f"{current_value:g}",
                     delta=f"{current_value - float(bet['line']):.1f} from target",
                     delta_color="normal"
                 )
             else:
-                st.info("📊 Waiting for stats...")
+                st.info("📊 No final stats recorded")
         
         with col2:
             st.metric("Target", bet['line'])
-            if current_value is not None:
-                if current_value >= float(bet['line']):
-                    st.success("✅ Target Reached!")
-                else:
-                    remaining = float(bet['line']) - current_value
-                    st.info(f"📈 Needs {remaining:.1f} more")
+            if bet['result'] == 'Hit':
+                st.success("✅ Hit")
+            elif bet['result'] == 'Miss':
+                st.error("❌ Miss")
             else:
-                st.info("🕒 Game not started")
+                st.info("🕒 Awaiting settlement")
         
         with col3:
             st.metric("Hit Rate", f"{bet['hit_rate']:.1f}%")
-            if bet['result'] == 'Pending':
-                if current_value is not None and current_value >= float(bet['line']):
-                    update_result(bet['id'], 'Hit')
-                    st.success("🎯 Bet Hit!")
-                else:
-                    st.write("📊 Tracking...")
             
-            if st.button("🗑️ Delete", key=f"delete_{bet['id']}", type="secondary"):
+            # delete_bet only reaches the hot table, and archived ids can repeat there
+            if not pd.isna(bet.get('archived_in')):
+                st.caption(f"Archived in {bet['archived_in']}")
+            elif st.button("🗑️ Delete", key=f"delete_{bet['id']}", type="secondary"):
                 delete_bet(bet['id'])
                 st.success("✅ Bet removed from tracking")
                 st.rerun()
@@ -862,19 +470,6 @@ def display_bet_card(bet):
 
 
 
-def update_live_tracking():
-    """
-    Updates all live bets every 60 seconds
-    """
-    while True:
-        results = load_results()
-        pending_bets = results[results['result'] == 'Pending']
-        
-        for _, bet in pending_bets.iterrows():
-            process_live_updates(bet['player'], bet['market'], bet['line'], bet['prediction'])
-        
-        sleep(60)
-
 def handle_tracking_errors():
     """
     Manages tracking errors and notifications
@@ -900,7 +495,7 @@ def add_advanced_analysis(df):
     st.header("🔥 Hot/Cold Analysis")
     col1, col2 = st.columns(2)
     with col1:
-        hot_players = df[df['Hit Rate: Last 5'] > 70].groupby('Player').agg({
+        hot_players = df[df['Hit Rate: Last 5'] > 70].groupby('Player', observed=True).agg({
             'Hit Rate: Last 5': 'mean',
             'Weighted Hit Rate': 'mean',
             'Market Name': lambda x: list(x.unique())
@@ -910,7 +505,7 @@ def add_advanced_analysis(df):
     
     # Opponent Matchup Analysis
     with col2:
-        matchup_success = df.groupby(['Player', 'Opponent'])['Hit Rate: Last 20'].mean()
+        matchup_success = df.groupby(['Player', 'Opponent'], observed=True)['Hit Rate: Last 20'].mean()
         best_matchups = matchup_success.sort_values(ascending=False)
         st.subheader("💪 Best Player vs Team Matchups")
         st.dataframe(best_matchups.head(10))
@@ -922,7 +517,8 @@ def add_advanced_analysis(df):
         values='Weighted Hit Rate',
         index='Player',
         columns='Market Name',
-        aggfunc='mean'
+        aggfunc='mean',
+        observed=True
     ).corr()
     fig = px.imshow(market_correlations, 
                     title="Market Type Correlations",
@@ -931,34 +527,12 @@ def add_advanced_analysis(df):
     
     # Time-Based Success Patterns
     st.header("⏰ Time-Based Success Patterns")
-    time_success = df.groupby('Time')['Weighted Hit Rate'].mean().sort_values(ascending=False)
+    time_success = df.groupby('Time', observed=True)['Weighted Hit Rate'].mean().sort_values(ascending=False)
     fig = px.bar(time_success, 
                  title="Win Rate by Game Time",
                  labels={'value': 'Success Rate', 'Time': 'Game Time'})
     st.plotly_chart(fig)
 
-def monitor_tracking_health():
-    """
-    Monitors tracking system health
-    """
-    while True:
-        try:
-            current_time = datetime.now()
-            last_update = st.session_state.tracking_status['last_update']
-            
-            if (current_time - last_update).seconds > 300:  # 5 minutes
-                notify_tracking_status("Tracking system delayed. Attempting to reconnect...", "warning")
-                initialize_tracking()
-            
-            for bet_id, data in st.session_state.tracking_status['active_bets'].items():
-                if (current_time - data['last_update']).seconds > 180:  # 3 minutes
-                    notify_tracking_status(f"Bet {bet_id} tracking delayed", "warning")
-            
-            sleep(60)
-        except Exception as e:
-            handle_tracking_errors()
-            notify_tracking_status(f"Tracking error: {str(e)}", "error")
-
 def track_bet_progress(bet_id, current_value, target):
     """
     Tracks the progress of a bet and returns a status dictionary
@@ -991,32 +565,80 @@ def initialize_tracking():
         st.session_state.tracking_errors = []
 
 
-def auto_refresh_stats():
-    if 'last_refresh' not in st.session_state:
-        st.session_state.last_refresh = datetime.now()
-    
-    current_time = datetime.now()
-    if (current_time - st.session_state.last_refresh).seconds >= 30:
-        results = load_results()
-        today = datetime.now().strftime('%Y-%m-%d')
-        
-        # Update live bets more frequently
-        live_bets = results[results['date'] == today]
-        for _, bet in live_bets.iterrows():
-            current_value = get_espn_stats(bet['player'], bet['market'])
-            if current_value:
-                st.session_state[f'live_stat_{bet["id"]}'] = current_value
-        
-        st.session_state.last_refresh = current_time
+def live_view(search_query):
+    """
+    Today's bets with their current stat values, recomputed only when the
+    predictions or stats data version moved since the last call
+    """
+    key = (data_versions(), search_query, datetime.now().strftime('%Y-%m-%d'))
+    cached = st.session_state.get('live_view')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    today = key[2]
+    results = todays_results()
+    if search_query:
+        results = results[results['player'].str.contains(search_query, case=False)]
+    todays_bets = results.sort_values('player')  # Sort by player name
+
+    # Snapshots written by stats_collector.py; settlement happens there too
+    stat_lines = load_stat_lines(today) if len(todays_bets) > 0 else {}
+    players = lookup_players(todays_bets['player'].unique(), active_ids=set(stat_lines))
+    cards, errors = [], []
+    for _, bet in todays_bets.iterrows():
+        entry = stat_lines.get(players['resolved'].get(bet['player']))
+        try:
+            cards.append((bet, market_value(entry['stats'], bet['market']) if entry else 0))
+        except UnknownMarketError as e:
+            errors.append(f"{bet['player']}: {e}")
+    unmatched = players['unresolved'] + list(players['ambiguous']) if stat_lines else []
+
+    view = {'has_results': len(load_results()) > 0, 'cards': cards, 'errors': errors, 'unmatched': unmatched}
+    st.session_state.live_view = (key, view)
+    return view
+
+
+@st.fragment(run_every=CHANGE_POLL_SECONDS)
+def live_tracking_section(search_query):
+    """Re-renders only the Live Tracking tab; data is re-read only after it changed"""
+    if st.button("Refresh Stats"):
+        st.session_state.pop('live_view', None)
+    view = live_view(search_query)
+    if not view['has_results']:
+        return
+
+    if view['cards'] or view['errors']:
+        st.subheader("Today's Active Bets")
+        if view['unmatched']:
+            st.warning(f"Could not match to an ESPN player: {', '.join(view['unmatched'])}")
+        for message in view['errors']:
+            st.error(message)
+        for bet, current_value in view['cards']:
+            display_live_bet_card(bet, current_value)
+    else:
+        st.info("No active bets for today")
+
+
+@st.fragment(run_every=CHANGE_POLL_SECONDS)
+def watch_predictions():
+    """
+    Polls the predictions data version and reruns the page only when bets
+    were tracked, settled or deleted since the last render
+    """
+    version = data_versions()['predictions']
+    seen = st.session_state.get('seen_predictions_version')
+    st.session_state.seen_predictions_version = version
+    if seen is not None and seen != version:
         st.rerun()
 
+
 def analyze_line_movement(df):
     st.header("📈 Line Movement Analysis")
     col1, col2 = st.columns(2)
     
     with col1:
         # Compare current lines to season averages
-        line_comparison = df.groupby('Player').agg({
+        line_comparison = df.groupby('Player', observed=True).agg({
             'Line': ['mean', 'std', 'last'],
             'Weighted Hit Rate': 'mean'
         })
@@ -1043,7 +665,8 @@ def find_optimal_stacks(df):
         values='Hit Rate: Last 20 Outcomes',
         index='Player',
         columns='Market Name',
-        aggfunc='mean'
+        aggfunc='mean',
+        observed=True
     ).corr()
     
     # Identify strong positive correlations
@@ -1066,13 +689,13 @@ def enhanced_market_analysis(df):
     st.header("💰 Advanced Market Insights")
     
     # Market success by time slots
-    time_analysis = df.groupby(['Time', 'Market Name'])['Weighted Hit Rate'].mean()
+    time_analysis = df.groupby(['Time', 'Market Name'], observed=True)['Weighted Hit Rate'].mean()
     fig_time = px.heat_map(time_analysis.unstack(), 
                           title="Best Markets by Game Time")
     st.plotly_chart(fig_time)
     
     # Opponent impact analysis
-    opp_analysis = df.groupby(['Opponent', 'Market Name'])['Hit Rate: Last 5'].mean()
+    opp_analysis = df.groupby(['Opponent', 'Market Name'], observed=True)['Hit Rate: Last 5'].mean()
     top_matchups = opp_analysis.unstack().sort_values(ascending=False)
     st.write("🎯 Top Player vs Team Matchups")
     st.dataframe(top_matchups.head(10))
@@ -1101,7 +724,8 @@ def generate_ai_insights(df):
         values='Hit Rate: Last 20',
         index='Player',
         columns='Market Name',
-        aggfunc='mean'
+        aggfunc='mean',
+        observed=True
     ).corr()
     
     strong_pairs = correlations[correlations > 0.85].stack()
@@ -1195,7 +819,7 @@ def generate_cross_team_parlays(df):
         (df['Hit Rate: Last 10'] > 55)
     ]
     
-    team_plays = high_prob_plays.groupby('Team')
+    team_plays = high_prob_plays.groupby('Team', observed=True)
     parlay_combinations = []
     teams = list(team_plays.groups.keys())
     
@@ -1246,7 +870,7 @@ def generate_cross_team_parlays(df):
 def analyze_game_scoring_leaders(df):
     st.subheader("🏆 Game Scoring Leaders")
     
-    games = df.groupby(['Team', 'Opponent'])
+    games = df.groupby(['Team', 'Opponent'], observed=True)
     for (team, opponent), game_data in games:
         st.write(f"📊 {team} vs {opponent}")
         
@@ -1324,16 +948,10 @@ def create_dashboard():
     if 'last_updates' not in st.session_state:
         st.session_state.last_updates = {}
     
-    auto_refresh_stats()
+    watch_predictions()
     
-    # Start all monitoring threads
-    validation_thread = threading.Thread(target=auto_validate_predictions, daemon=True)
-    tracking_thread = threading.Thread(target=update_live_tracking, daemon=True)
-    health_thread = threading.Thread(target=monitor_tracking_health, daemon=True)
-    
-    validation_thread.start()
-    tracking_thread.start()
-    health_thread.start()
+    # Live stats and settlement come from stats_collector.py running as its
+    # own process; the dashboard only reads what it writes.
     
     with st.sidebar:
         st.header("System Status")
@@ -1346,6 +964,18 @@ def create_dashboard():
         
         st.metric("Active Trackers", len(st.session_state.tracking_status['active_bets']))
         st.metric("Last Update", st.session_state.tracking_status['last_update'].strftime("%H:%M:%S"))
+        
+        last_snapshot = last_snapshot_time()
+        if last_snapshot is None:
+            st.warning("No stats collected today. Start `python stats_collector.py`.")
+        else:
+            st.metric("Stats Collected", last_snapshot.strftime("%H:%M:%S"))
+        
+        espn_cache = cache_stats()
+        st.metric("ESPN Cache Hit Rate", f"{espn_cache['hit_rate']:.1f}%")
+        st.caption(f"Hits: {espn_cache['hits'] + espn_cache['shared']} | Misses: {espn_cache['misses']} | Cached: {espn_cache['entries']}")
+        writes = queue_stats()
+        st.caption(f"Queued writes: {writes['queued']} | Written: {writes['rows']} | Failed batches: {writes['errors']}")
     
     tabs = st.tabs(["Today's Best Bets", "Live Tracking", "Historical Bets", "Analysis"])
     
@@ -1362,8 +992,12 @@ def create_dashboard():
     
     uploaded_file = st.file_uploader("Upload your predictions CSV", type=['csv'])
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file)
+        df = load_slate(uploaded_file)  # parsed once per distinct file
         st.session_state.prediction_data = df
+        # Keep a columnar copy of each new slate for backtests
+        if st.session_state.get('snapshotted_upload') != uploaded_file.file_id:
+            snapshot_slate(df)
+            st.session_state.snapshotted_upload = uploaded_file.file_id
     
     with tabs[0]:  # Today's Best Bets
         if 'prediction_data' in st.session_state:
@@ -1373,6 +1007,21 @@ def create_dashboard():
             best_bets = filter_todays_best_bets(df)
             st.header("🎯 Today's Best Bets")
             if len(best_bets) > 0:
+                rows = {
+                    f"{bet['Player']} - {bet['Market Name']} {bet['Line']}": idx
+                    for idx, bet in best_bets[['Player', 'Market Name', 'Line']].iterrows()
+                }
+                selected = [rows[label] for label in
+                            st.multiselect("Select bets to track", list(rows), key="track_selection")]
+                col1, col2 = st.columns(2)
+                with col1:
+                    track_selected = st.button(f"Track Selected ({len(selected)})", disabled=not selected)
+                with col2:
+                    track_all = st.button(f"Track All ({len(best_bets)})")
+                if track_selected or track_all:
+                    written = save_predictions(best_bets if track_all else best_bets.loc[selected])
+                    st.success(f"Tracked {written} bets" if written else "All selected bets are already tracked")
+
                 for idx, bet in best_bets.iterrows():
                     with st.expander(f"{bet['Player']} - {bet['Market Name']}"):
                         col1, col2, col3 = st.columns([2,1,1])
@@ -1384,46 +1033,26 @@ def create_dashboard():
                             st.write(f"Season: {bet['Hit Rate: Season']}%")
                         with col3:
                             if st.button("Track Bet", key=f"track_{idx}"):
-                                save_prediction(bet)
-                                st.success("Bet tracked!")
+                                if save_prediction(bet):
+                                    st.success("Bet tracked!")
+                                else:
+                                    st.info("Already tracking this bet")
     
     with tabs[1]:  # Live Tracking
-        results = load_results()
-        if len(results) > 0:
-            if st.session_state.search_query:
-                results = results[results['player'].str.contains(st.session_state.search_query, case=False)]
-            
-            today = datetime.now().strftime('%Y-%m-%d')
-            todays_bets = results[results['date'] == today].sort_values('player')  # Sort by player name
-            
-            refresh_placeholder = st.empty()
-            with refresh_placeholder.container():
-                if len(todays_bets) > 0:
-                    st.subheader("Today's Active Bets")
-                    for idx, bet in todays_bets.iterrows():
-                        stats_data = get_espn_stats(bet['player'], bet['market'])
-                        current_value = stats_data['current_value'] if isinstance(stats_data, dict) else stats_data
-                        
-                        # Check if bet should be marked complete
-                        if current_value is not None:
-                            target = float(bet['line'])
-                            if current_value >= target:
-                                update_result(bet['id'], 'Hit')
-                        
-                        display_live_bet_card(bet)
-                else:
-                    st.info("No active bets for today")
-                    
-            if st.button("Refresh Stats"):
-                st.rerun()
-
-
-
-
-
+        live_tracking_section(st.session_state.search_query)
 
     with tabs[2]:  # Historical Bets
-        results = load_results()
+        include_archived = st.checkbox("Include archived seasons", key="include_archived")
+        if include_archived:
+            results = query_results(include_archived=True)
+            summary = season_summary()
+            if summary:
+                with st.expander("Archived season summary"):
+                    st.dataframe(pd.DataFrame(summary, columns=[
+                        'Season', 'Market', 'Bets', 'Hits', 'Misses', 'Avg Hit Rate'
+                    ]), hide_index=True)
+        else:
+            results = load_results()
         if len(results) > 0:
             if st.session_state.search_query:
                 results = results[results['player'].str.contains(st.session_state.search_query, case=False)]
@@ -1434,12 +1063,29 @@ def create_dashboard():
             ].sort_values(['date', 'player'], ascending=[False, True])  # Sort by date (newest first) and player name
             
             if len(historical_bets) > 0:
-                hits = len(historical_bets[historical_bets['result'] == 'Hit'])
-                total = len(historical_bets[historical_bets['result'] != 'Pending'])
+                if st.session_state.search_query:
+                    hits = len(historical_bets[historical_bets['result'] == 'Hit'])
+                    total = len(historical_bets[historical_bets['result'] != 'Pending'])
+                else:
+                    # Materialized totals, minus anything already settled today
+                    total, hits, _ = totals()
+                    today_total, today_hits, _ = totals('day', today)
+                    total, hits = total - today_total, hits - today_hits
+                    if not include_archived:
+                        # The rollups keep counting archived seasons; take their per-season summaries back out
+                        archived = season_summary()
+                        total -= sum((season_hits or 0) + (misses or 0) for _, _, _, season_hits, misses, _ in archived)
+                        hits -= sum(season_hits or 0 for _, _, _, season_hits, _, _ in archived)
                 if total > 0:
                     win_rate = (hits / total) * 100
                     st.metric("Historical Win Rate", f"{win_rate:.1f}%")
                 
+                if 'actual' in historical_bets.columns:
+                    unsettled = historical_bets['actual'].isna().sum()
+                    if unsettled > 0:
+                        st.caption(f"{unsettled} past bets have no final stats yet. "
+                                   "Run `python settlement.py --backfill` to settle them.")
+                
                 for idx, bet in historical_bets.iterrows():
                     display_bet_card(bet)
             else:
@@ -1471,7 +1117,7 @@ def create_dashboard():
             with market_col1:
                 market_analysis(df)
             with market_col2:
-                top_markets = df.groupby('Market Name')['Weighted Hit Rate'].mean().sort_values(ascending=False)
+                top_markets = df.groupby('Market Name', observed=True)['Weighted Hit Rate'].mean().sort_values(ascending=False)
                 st.subheader("Most Profitable Markets")
                 fig = px.bar(top_markets, title="Market Success Rates")
                 st.plotly_chart(fig)
@@ -1481,7 +1127,7 @@ def create_dashboard():
             line_col1, line_col2 = st.columns(2)
             with line_col1:
                 # Compare lines to season averages
-                line_comparison = df.groupby(['Player', 'Market Name']).agg({
+                line_comparison = df.groupby(['Player', 'Market Name'], observed=True).agg({
                     'Line': ['mean', 'std', 'last'],
                     'Weighted Hit Rate': 'mean'
                 }).round(2)
@@ -1507,7 +1153,7 @@ def create_dashboard():
             with player_col1:
                 player_performance(df)
             with player_col2:
-                recent_form = df.groupby('Player')['Hit Rate: Last 5'].mean().sort_values(ascending=False)
+                recent_form = df.groupby('Player', observed=True)['Hit Rate: Last 5'].mean().sort_values(ascending=False)
                 fig = px.bar(recent_form.head(10), title="Top Players by Recent Form")
                 st.plotly_chart(fig)
             
@@ -1530,7 +1176,8 @@ def create_dashboard():
                     values='Hit Rate: Last 20',
                     index='Player',
                     columns='Market Name',
-                    aggfunc='mean'
+                    aggfunc='mean',
+                    observed=True
                 ).corr()
                 strong_pairs = correlations.unstack()
                 strong_pairs = strong_pairs[(strong_pairs > 0.7) & (strong_pairs < 1.0)]
@@ -1543,7 +1190,7 @@ def create_dashboard():
             st.header("🔥 Hot/Cold Analysis")
             hot_col1, hot_col2 = st.columns(2)
             with hot_col1:
-                hot_players = df[df['Hit Rate: Last 5'] > 70].groupby('Player').agg({
+                hot_players = df[df['Hit Rate: Last 5'] > 70].groupby('Player', observed=True).agg({
                     'Hit Rate: Last 5': 'mean',
                     'Weighted Hit Rate': 'mean',
                     'Market Name': lambda x: list(x.unique())
@@ -1552,7 +1199,7 @@ def create_dashboard():
                 st.dataframe(hot_players.head(10))
             
             with hot_col2:
-                matchup_success = df.groupby(['Player', 'Opponent'])['Hit Rate: Last 20'].mean()
+                matchup_success = df.groupby(['Player', 'Opponent'], observed=True)['Hit Rate: Last 20'].mean()
                 best_matchups = matchup_success.sort_values(ascending=False)
                 st.subheader("💪 Best Player vs Team Matchups")
                 st.dataframe(best_matchups.head(10))
@@ -1564,7 +1211,8 @@ def create_dashboard():
                 values='Weighted Hit Rate',
                 index='Player',
                 columns='Market Name',
-                aggfunc='mean'
+                aggfunc='mean',
+                observed=True
             ).corr()
             fig = px.imshow(market_correlations,
                             title="Market Type Correlations",
@@ -1573,7 +1221,7 @@ def create_dashboard():
             
             # Time Analysis
             st.header("⏰ Time-Based Success Patterns")
-            time_success = df.groupby('Time')['Weighted Hit Rate'].mean().sort_values(ascending=False)
+            time_success = df.groupby('Time', observed=True)['Weighted Hit Rate'].mean().sort_values(ascending=False)
             fig = px.bar(time_success,
                         title="Win Rate by Game Time",
                         labels={'value': 'Success Rate', 'Time': 'Game Time'})
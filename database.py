@@ -0,0 +1,122 @@
+"""
+Shared SQLite access for predictions.db.
+
+Connections are opened once in WAL mode with tuned pragmas and a statement
+cache, then handed out from a thread-safe pool. Readers no longer block
+behind the collector's writes, and callers skip the per-call connect cost.
+
+    with connection() as conn:      # borrowed connection, returned on exit
+        conn.execute(...)
+    with transaction() as conn:     # BEGIN IMMEDIATE ... COMMIT / ROLLBACK
+        conn.executemany(...)
+"""
+import atexit
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+DB_PATH = 'predictions.db'
+POOL_SIZE = 8
+BUSY_TIMEOUT = 10  # seconds a writer waits for the lock before failing
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -16000',  # 16 MB page cache per connection
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA foreign_keys = ON',
+)
+
+_pools = {}  # database path -> LifoQueue of idle connections
+_pools_lock = threading.Lock()
+
+
+def _connect(path):
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _pool(path):
+    with _pools_lock:
+        if path not in _pools:
+            _pools[path] = queue.LifoQueue(maxsize=POOL_SIZE)
+        return _pools[path]
+
+
+@contextmanager
+def connection(path=None):
+    """
+    Borrows a pooled connection. Any transaction left open is rolled back
+    before the connection goes back to the pool.
+    """
+    path = path or DB_PATH
+    pool = _pool(path)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _connect(path)
+
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+@contextmanager
+def transaction(path=None):
+    """
+    Runs the block in one write transaction, taking the write lock up front
+    so concurrent writers queue instead of failing mid-transaction.
+    """
+    with connection(path) as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+
+def query(sql, params=(), path=None):
+    """Runs a read query and returns all rows"""
+    with connection(path) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def read_frame(sql, params=(), path=None):
+    """Runs a read query into a DataFrame"""
+    with connection(path) as conn:
+        return pd.read_sql(sql, conn, params=params)
+
+
+def close_all():
+    """Closes every idle pooled connection"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# Close the pool on interpreter exit, after write_queue (which imports this module) has flushed
+atexit.register(close_all)
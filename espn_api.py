@@ -0,0 +1,303 @@
+"""
+Shared access to the ESPN scoreboard and box-score (summary) endpoints.
+
+Every response is cached process-wide by URL. Payloads for games that are
+in progress expire quickly, payloads for finished games never expire, and
+concurrent callers asking for the same URL share a single HTTP request.
+
+Requests go through one pooled keep-alive session with a timeout on every
+call and jittered retries, and per-game summaries can be fetched in parallel
+on a bounded thread pool.
+
+Payloads are also recorded in box_score_archive; finished games are served
+from the archive instead of the network, and replay mode (ESPN_REPLAY=1 or
+set_replay_mode) serves everything from it.
+"""
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import box_score_archive
+from box_score_archive import ArchiveMiss
+
+SCOREBOARD_URL = "https://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard"
+SUMMARY_URL = "https://site.api.espn.com/apis/site/v2/sports/basketball/nba/summary?event={event_id}"
+ROSTER_URL = "https://site.api.espn.com/apis/site/v2/sports/basketball/nba/teams/{team_id}/roster"
+
+REQUEST_TIMEOUT = 10
+MAX_CONCURRENCY = 8
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Seconds a cached payload stays fresh, by game state. None means forever.
+STATE_TTLS = {
+    'pre': 60,
+    'in': 10,
+    'post': None,
+}
+DEFAULT_TTL = 60
+ROSTER_TTL = 6 * 60 * 60
+MAX_CACHE_ENTRIES = 512
+
+ARCHIVE_ENABLED = os.environ.get('ESPN_ARCHIVE', '1') != '0'
+REPLAY = os.environ.get('ESPN_REPLAY') == '1'
+
+_cache = OrderedDict()  # url -> (expires_at or None, payload)
+_inflight = {}          # url -> Future shared by concurrent callers
+_lock = threading.Lock()
+_counters = {'hits': 0, 'misses': 0, 'shared': 0, 'archive_hits': 0}
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Returns the shared keep-alive session, sized for MAX_CONCURRENCY connections"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONCURRENCY)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+    return _session
+
+
+def http_get(url, timeout=REQUEST_TIMEOUT, attempts=MAX_ATTEMPTS, **kwargs):
+    """
+    GETs `url` on the shared session, retrying connection errors, timeouts
+    and 429/5xx responses with exponential backoff and full jitter.
+    """
+    for attempt in range(attempts):
+        try:
+            response = get_session().get(url, timeout=timeout, **kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == attempts - 1:
+                raise
+        time.sleep(random.uniform(0, BACKOFF_BASE * 2 ** attempt))
+
+
+def map_concurrent(func, items, max_workers=None):
+    """Runs `func` over `items` on a bounded thread pool and returns the results in order"""
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    workers = min(max_workers or MAX_CONCURRENCY, len(items))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, items))
+
+
+def ttl_for_state(state):
+    """Return the cache lifetime for a payload describing a game in `state`"""
+    return STATE_TTLS.get(state, DEFAULT_TTL)
+
+
+def _scoreboard_ttl(payload, dated=True):
+    """
+    Lifetime of a scoreboard payload. Only a dated scoreboard whose games
+    are all over is permanent; the undated one rolls over to the next day.
+    """
+    states = {event.get('status', {}).get('type', {}).get('state', '')
+              for event in payload.get('events', [])}
+    if states and states == {'post'}:
+        return ttl_for_state('post') if dated else ttl_for_state('pre')
+    if 'in' in states:
+        return ttl_for_state('in')
+    return ttl_for_state('pre')
+
+
+def _summary_state(payload):
+    competitions = payload.get('header', {}).get('competitions', [])
+    if competitions:
+        return competitions[0].get('status', {}).get('type', {}).get('state', '')
+    return payload.get('status', {}).get('type', {}).get('state', '')
+
+
+def _cached(url):
+    entry = _cache.get(url)
+    if entry is None:
+        return None
+    expires_at, payload = entry
+    if expires_at is not None and expires_at <= time.monotonic():
+        del _cache[url]
+        return None
+    _cache.move_to_end(url)
+    return payload
+
+
+def _store(url, payload, ttl):
+    expires_at = None if ttl is None else time.monotonic() + ttl
+    _cache[url] = (expires_at, payload)
+    _cache.move_to_end(url)
+    while len(_cache) > MAX_CACHE_ENTRIES:
+        _cache.popitem(last=False)
+
+
+def set_replay_mode(enabled):
+    """Serves every request from box_score_archive instead of the network"""
+    global REPLAY
+    REPLAY = enabled
+
+
+def _fetch_payload(url, archive_key, is_final):
+    # A callable archive_key names the record after the payload arrives, so it can't be looked up first
+    if archive_key is not None and not callable(archive_key):
+        kind, key = archive_key
+        payload = box_score_archive.load(kind, key, final_only=not REPLAY)
+        if payload is not None:
+            with _lock:
+                _counters['archive_hits'] += 1
+            return payload
+    if REPLAY:
+        raise ArchiveMiss(f"No archived payload for {url}")
+
+    response = http_get(url)
+    response.raise_for_status()
+    payload = response.json()
+
+    if callable(archive_key):
+        archive_key = archive_key(payload)
+    if archive_key is not None and ARCHIVE_ENABLED:
+        kind, key = archive_key
+        try:
+            box_score_archive.store(kind, key, payload, final=bool(is_final and is_final(payload)))
+        except OSError:
+            pass
+    return payload
+
+
+def fetch_json(url, ttl=None, archive_key=None, is_final=None):
+    """
+    Returns the JSON payload for `url`, from the cache when it is still fresh.
+
+    `ttl` is a callable receiving the payload and returning its lifetime in
+    seconds (None for permanent). Only one request per URL is in flight at a
+    time; other callers block on it and receive the same payload or error.
+
+    `archive_key` is a (kind, key) pair under which the payload is recorded
+    in box_score_archive, or a callable deriving that pair (or None) from the
+    fetched payload; `is_final` decides whether that record is permanent.
+    """
+    with _lock:
+        payload = _cached(url)
+        if payload is not None:
+            _counters['hits'] += 1
+            return payload
+        future = _inflight.get(url)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[url] = future
+            _counters['misses'] += 1
+        else:
+            _counters['shared'] += 1
+
+    if not leader:
+        return future.result()
+
+    try:
+        payload = _fetch_payload(url, archive_key, is_final)
+    except Exception as e:
+        with _lock:
+            del _inflight[url]
+        future.set_exception(e)
+        raise
+
+    lifetime = ttl(payload) if ttl is not None else DEFAULT_TTL
+    with _lock:
+        _store(url, payload, lifetime)
+        del _inflight[url]
+    future.set_result(payload)
+    return payload
+
+
+def _scoreboard_day(payload):
+    """Archive key for a scoreboard payload: the day it describes, or None if it doesn't say"""
+    day = payload.get('day', {}).get('date')
+    return ('scoreboard', day.replace('-', '')) if day else None
+
+
+def get_scoreboard(game_date=None):
+    """
+    Fetches the scoreboard for `game_date` (YYYY-MM-DD or YYYYMMDD), today by
+    default. The undated scoreboard is archived under the day in its payload,
+    which after midnight can still be the previous day.
+    """
+    if game_date:
+        date_key = str(game_date).replace('-', '')
+        url = f"{SCOREBOARD_URL}?dates={date_key}"
+        archive_key = ('scoreboard', date_key)
+    else:
+        url = SCOREBOARD_URL
+        archive_key = ('scoreboard', datetime.now().strftime('%Y%m%d')) if REPLAY else _scoreboard_day
+    return fetch_json(url, ttl=lambda payload: _scoreboard_ttl(payload, dated=bool(game_date)),
+                      archive_key=archive_key,
+                      is_final=lambda payload: _scoreboard_ttl(payload) is None)
+
+
+def get_summary(event_id, state=None):
+    """
+    Fetches the box score summary for one game.
+
+    `state` is the game state already known from the scoreboard; it is only
+    used when the payload itself does not carry one.
+    """
+    url = SUMMARY_URL.format(event_id=event_id)
+    return fetch_json(url, ttl=lambda payload: ttl_for_state(_summary_state(payload) or state),
+                      archive_key=('summary', event_id),
+                      is_final=lambda payload: (_summary_state(payload) or state) == 'post')
+
+
+def get_roster(team_id):
+    """Fetches a team's current roster"""
+    url = ROSTER_URL.format(team_id=team_id)
+    return fetch_json(url, ttl=lambda payload: ROSTER_TTL, archive_key=('roster', team_id))
+
+
+def get_summaries(games, max_workers=None):
+    """
+    Fetches several box score summaries concurrently.
+
+    `games` is an iterable of (event_id, state) pairs. Returns
+    {event_id: payload}; games whose request failed are left out.
+    """
+    def fetch(game):
+        event_id, state = game
+        try:
+            return event_id, get_summary(event_id, state)
+        except (requests.exceptions.RequestException, ValueError):
+            return event_id, None
+
+    results = map_concurrent(fetch, games, max_workers)
+    return {event_id: payload for event_id, payload in results if payload is not None}
+
+
+def cache_stats():
+    """Returns hit/miss counters and the current size of the response cache"""
+    with _lock:
+        lookups = _counters['hits'] + _counters['misses'] + _counters['shared']
+        # archive_hits are a subset of misses: served from disk, not the network
+        return {
+            **_counters,
+            'entries': len(_cache),
+            'in_flight': len(_inflight),
+            'hit_rate': (_counters['hits'] + _counters['shared']) / lookups * 100 if lookups else 0.0,
+        }
+
+
+def clear_cache():
+    """Drops every cached payload and resets the counters"""
+    with _lock:
+        _cache.clear()
+        for key in _counters:
+            _counters[key] = 0
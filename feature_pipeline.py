@@ -0,0 +1,167 @@
+"""
+Engineered features for a PrizePicks slate.
+
+FeaturePipeline wraps a typed slate (see slate_ingest) and computes
+features on demand: asking for Composite_Score computes only what it
+depends on, and every feature is computed at most once per pipeline. All
+features are whole-column operations, so the cost is the same whether
+the slate has fifty props or five thousand.
+
+    pipeline = FeaturePipeline(load_slate('slate.csv'))
+    frame = pipeline.compute(['Composite_Score', 'Volatility'])
+"""
+import pandas as pd
+
+import outcome_features
+from slate_ingest import HIT_RATE_COLUMNS, OUTCOMES_COLUMN
+
+# Feature name -> function(pipeline) returning it; names starting with '_' are intermediates
+FEATURES = {}
+
+
+def feature(name):
+    def register(fn):
+        FEATURES[name] = fn
+        return fn
+    return register
+
+
+def feature_names():
+    return [name for name in FEATURES if not name.startswith('_')]
+
+
+class FeaturePipeline:
+    """
+    Lazily computed features over one slate. Missing hit rates are filled
+    with their column mean before any feature is computed.
+
+    Column statistics (those means and Market_Success) come from
+    `reference` when given, e.g. a model's training rows, and from the slate
+    itself otherwise.
+    """
+
+    def __init__(self, slate, reference=None):
+        self.slate = slate.copy()
+        rates = [column for column in HIT_RATE_COLUMNS if column in self.slate.columns]
+        means = (self.slate if reference is None else reference)[rates].mean()
+        self.slate[rates] = self.slate[rates].fillna(means)
+        if reference is None:
+            self.reference = self.slate
+        else:
+            self.reference = reference.copy()
+            self.reference[rates] = self.reference[rates].fillna(means)
+        self._computed = {}
+
+    def __getitem__(self, name):
+        """A computed feature, or a slate column"""
+        if name not in FEATURES:
+            return self.slate[name]
+        if name not in self._computed:
+            self._computed[name] = FEATURES[name](self)
+        return self._computed[name]
+
+    def series(self, values):
+        return pd.Series(values, index=self.slate.index)
+
+    def compute(self, features=None):
+        """The slate plus `features` (every feature by default) as new columns"""
+        names = feature_names() if features is None else features
+        return self.slate.assign(**{name: self[name] for name in names})
+
+
+@feature('_outcomes')
+def _outcomes(p):
+    return outcome_features.encode_outcomes(p[OUTCOMES_COLUMN])
+
+
+@feature('Outcome_Bits')
+def _outcome_bits(p):
+    return p.series(p['_outcomes'][0])
+
+
+@feature('Outcome_Games')
+def _outcome_games(p):
+    return p.series(p['_outcomes'][1])
+
+
+@feature('Volatility')
+def _volatility(p):
+    return p.series(outcome_features.volatility(*p['_outcomes']))
+
+
+@feature('Streak_Quality')
+def _streak_quality(p):
+    return p.series(outcome_features.streak_quality(p['_outcomes'][0]))
+
+
+@feature('Recent_Trend')
+def _recent_trend(p):
+    return p.series(outcome_features.recent_trend(*p['_outcomes']))
+
+
+@feature('Current_Streak')
+def _current_streak(p):
+    return p.series(outcome_features.longest_streak(p['_outcomes'][0]))
+
+
+@feature('Last_5_Hits')
+def _last_5_hits(p):
+    return p.series(outcome_features.hits_in_last(p['_outcomes'][0], 5))
+
+
+@feature('Majority_Hits')
+def _majority_hits(p):
+    """Hit in more than half of the recorded games"""
+    bits, lengths = p['_outcomes']
+    return p.series(outcome_features.popcount(bits) * 2 > lengths)
+
+
+@feature('Market_Success')
+def _market_success(p):
+    """Mean season hit rate of the prop's market; markets the reference lacks get its overall mean"""
+    season = p.reference['Hit Rate: Season']
+    markets = season.groupby(p.reference['Market Name'], observed=True).mean()
+    success = p.slate['Market Name'].astype(object).map(markets).astype(float)
+    return success.fillna(season.mean())
+
+
+@feature('Opponent_Impact')
+def _opponent_impact(p):
+    return (p['Hit Rate: Vs Opponent'] - p['Hit Rate: Season']).fillna(0)
+
+
+@feature('Weighted_Recent')
+def _weighted_recent(p):
+    return (
+        p['Hit Rate: Last 5'] * 0.6 +
+        p['Hit Rate: Last 10'] * 0.25 +
+        p['Hit Rate: Last 20'] * 0.1 +
+        p['Hit Rate: Season'] * 0.05
+    )
+
+
+@feature('Recent_Average')
+def _recent_average(p):
+    return p['Hit Rate: Last 5'] * 0.8 + p['Hit Rate: Last 10'] * 0.2
+
+
+@feature('Composite_Score')
+def _composite_score(p):
+    return (
+        p['Weighted_Recent'] * 0.3 +
+        p['Recent_Trend'] * 0.3 +
+        p['Market_Success'] * 0.2 +
+        p['Opponent_Impact'] * 0.2
+    )
+
+
+@feature('Consistency')
+def _consistency(p):
+    """Population standard deviation of the recent hit rates and Weighted_Recent"""
+    spread = pd.concat([
+        p['Hit Rate: Last 5'],
+        p['Hit Rate: Last 10'],
+        p['Hit Rate: Last 20'],
+        p['Weighted_Recent'],
+    ], axis=1)
+    return spread.std(axis=1, ddof=0)
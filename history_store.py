@@ -0,0 +1,86 @@
+"""
+Moves the legacy prediction_history.csv into predictions.db and exports the
+unified store back out as CSV or Parquet.
+
+Model predictions and tracked bets now share the predictions table, so the
+CSV is only an import source or an export target:
+
+    python history_store.py import prediction_history.csv
+    python history_store.py export history.parquet --start 2025-01-01
+"""
+import argparse
+import os
+
+import pandas as pd
+
+from results_store import query_results, record_predictions
+
+# prediction_history.csv column -> predictions column
+CSV_COLUMNS = {
+    'Date': 'date',
+    'Player': 'player',
+    'Market': 'market',
+    'Line': 'line',
+    'Hit Rate: Last 5': 'hit_rate_last_5',
+    'Hit Rate: Last 10': 'hit_rate_last_10',
+    'Hit Rate: Last 20': 'hit_rate_last_20',
+    'Hit Rate: Season': 'hit_rate_season',
+    'Hit Rate: Vs Opponent': 'hit_rate_vs_opponent',
+    'Weighted Hit Rate': 'hit_rate',
+    'Last 20 Outcomes': 'last_20_outcomes',
+    'Prediction': 'prediction',
+    'Confidence': 'confidence',
+    'Actual': 'actual',
+    'Result': 'result',
+}
+
+RESULT_VALUES = {True: 'Hit', False: 'Miss', 'True': 'Hit', 'False': 'Miss', 'Hit': 'Hit', 'Miss': 'Miss'}
+
+
+def read_history_csv(path):
+    """Reads a prediction history CSV, with or without its header row"""
+    with open(path) as f:
+        has_header = f.readline().startswith('Date,')
+    return pd.read_csv(path, header=0 if has_header else None,
+                       names=None if has_header else list(CSV_COLUMNS),
+                       dtype={'Last 20 Outcomes': str})
+
+
+def history_records(history):
+    """Converts CSV history rows into record_predictions() dicts"""
+    frame = history.rename(columns=CSV_COLUMNS)[list(CSV_COLUMNS.values())]
+    frame['result'] = frame['result'].map(RESULT_VALUES).fillna('Pending')
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict('records')
+
+
+def import_csv(path='prediction_history.csv'):
+    """Imports a prediction history CSV and returns how many predictions were new"""
+    return record_predictions(history_records(read_history_csv(path)))
+
+
+def export(path, start=None, end=None):
+    """Writes every stored prediction, archived seasons included, to CSV or Parquet"""
+    frame = query_results(start=start, end=end, include_archived=True)
+    if os.path.splitext(path)[1].lower() == '.parquet':
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+    return len(frame)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import or export the prediction history")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help="import a prediction_history.csv into predictions.db")
+    import_parser.add_argument('path', nargs='?', default='prediction_history.csv')
+    export_parser = subparsers.add_parser('export', help="export predictions to .csv or .parquet")
+    export_parser.add_argument('path')
+    export_parser.add_argument('--start', help="first date (YYYY-MM-DD)")
+    export_parser.add_argument('--end', help="last date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        print(f"Imported {import_csv(args.path)} predictions from {args.path}")
+    else:
+        print(f"Exported {export(args.path, args.start, args.end)} predictions to {args.path}")
@@ -0,0 +1,117 @@
+"""
+Registry of PrizePicks markets as weighted sums of box-score columns.
+
+Definitions are compiled once into a (markets x columns) weight matrix, so
+evaluating any number of (player, market) pairs is one row-wise dot product
+over their stat rows. Markets missing from the registry raise
+UnknownMarketError instead of quietly evaluating to 0.
+"""
+import numpy as np
+
+from box_score import COLUMNS, COLUMN_INDEX
+
+MARKETS = {
+    'Points': {'PTS': 1},
+    'Rebounds': {'REB': 1},
+    'Offensive Rebounds': {'OREB': 1},
+    'Defensive Rebounds': {'DREB': 1},
+    'Assists': {'AST': 1},
+    'Steals': {'STL': 1},
+    'Blocks': {'BLK': 1},
+    'Turnovers': {'TO': 1},
+    'Personal Fouls': {'PF': 1},
+    '3PT Made': {'3PM': 1},
+    '3PT Attempted': {'3PA': 1},
+    'FG Made': {'FGM': 1},
+    'FG Attempted': {'FGA': 1},
+    'Free Throws Made': {'FTM': 1},
+    'Free Throws Attempted': {'FTA': 1},
+    'PTS+REB': {'PTS': 1, 'REB': 1},
+    'PTS+AST': {'PTS': 1, 'AST': 1},
+    'REB+AST': {'REB': 1, 'AST': 1},
+    'PTS+REB+AST': {'PTS': 1, 'REB': 1, 'AST': 1},
+    'BLK+STL': {'BLK': 1, 'STL': 1},
+    'Fantasy Score': {'PTS': 1, 'REB': 1.2, 'AST': 1.5, 'BLK': 3, 'STL': 3, 'TO': -1},
+}
+
+# Alternative spellings seen in PrizePicks exports and older rows
+ALIASES = {
+    'STL+BLK': 'BLK+STL',
+    'Blks+Stls': 'BLK+STL',
+    'Pts+Rebs': 'PTS+REB',
+    'Pts+Asts': 'PTS+AST',
+    'Rebs+Asts': 'REB+AST',
+    'Pts+Rebs+Asts': 'PTS+REB+AST',
+    '3-PT Made': '3PT Made',
+    '3-PT Attempted': '3PT Attempted',
+    'Three Pointers Made': '3PT Made',
+}
+
+
+class UnknownMarketError(ValueError):
+    """Raised for market names that are not in the registry"""
+
+    def __init__(self, markets):
+        self.markets = sorted(set(markets))
+        super().__init__(f"Unknown market(s): {', '.join(self.markets)}")
+
+
+def compile_markets(markets):
+    """Compiles {market: {column: weight}} into (names, index, weight matrix)"""
+    names = list(markets)
+    weights = np.zeros((len(names), len(COLUMNS)), dtype=np.float32)
+    for i, name in enumerate(names):
+        for column, weight in markets[name].items():
+            weights[i, COLUMN_INDEX[column]] = weight
+    return names, {name: i for i, name in enumerate(names)}, weights
+
+
+MARKET_NAMES, MARKET_INDEX, WEIGHTS = compile_markets(MARKETS)
+
+
+def canonical_market(market):
+    return ALIASES.get(market, market)
+
+
+def is_known_market(market):
+    return canonical_market(market) in MARKET_INDEX
+
+
+def market_indices(markets):
+    """Maps market names to weight-matrix rows, raising for any unknown ones"""
+    canonical = [canonical_market(market) for market in markets]
+    unknown = [market for market, name in zip(markets, canonical) if name not in MARKET_INDEX]
+    if unknown:
+        raise UnknownMarketError(unknown)
+    return np.fromiter((MARKET_INDEX[name] for name in canonical), dtype=np.intp, count=len(canonical))
+
+
+def market_weights(market):
+    """Returns {column: weight} for a market, raising for unknown ones"""
+    if not is_known_market(market):
+        raise UnknownMarketError([market])
+    return MARKETS[canonical_market(market)]
+
+
+def stat_vector(stat_line):
+    """Turns a {column: value} stat line into a row aligned with box_score.COLUMNS"""
+    return np.array([stat_line.get(column, 0) for column in COLUMNS], dtype=np.float32)
+
+
+def evaluate(stat_rows, markets):
+    """
+    Evaluates markets[i] against stat_rows[i] for every pair at once.
+
+    `stat_rows` is an (n x len(COLUMNS)) array, e.g. rows gathered from a
+    BoxScore matrix; returns a float array of n market values.
+    """
+    index = market_indices(markets)
+    if len(index) == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.einsum('ij,ij->i', np.asarray(stat_rows, dtype=np.float32), WEIGHTS[index])
+
+
+def market_value(stat_line, market):
+    """Evaluates a single market against a {column: value} stat line"""
+    value = float(evaluate(stat_vector(stat_line)[None, :], [market])[0])
+    return int(value) if value.is_integer() else round(value, 2)
@@ -0,0 +1,264 @@
+"""
+Versioned schema migrations for predictions.db.
+
+Every migration runs once, in its own transaction, and is recorded in the
+`schema_version` table, so any existing database (the shipped one, one made
+by setup_database.py or by an older dashboard) is brought up to the same
+canonical schema:
+
+    python migrations.py
+"""
+from datetime import datetime
+
+from database import DB_PATH, transaction
+
+# Columns identifying one tracked bet; duplicates are rejected
+BET_KEY = ('date', 'player', 'market', 'line', 'prediction')
+
+# What the model saw when it made a prediction
+FEATURE_COLUMNS = {
+    'hit_rate_last_5': 'REAL',
+    'hit_rate_last_10': 'REAL',
+    'hit_rate_last_20': 'REAL',
+    'hit_rate_season': 'REAL',
+    'hit_rate_vs_opponent': 'REAL',
+    'last_20_outcomes': 'TEXT',
+    'confidence': 'REAL',
+}
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def _create_predictions(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS predictions (
+            id INTEGER PRIMARY KEY,
+            date TEXT,
+            player TEXT,
+            market TEXT,
+            line REAL,
+            prediction TEXT,
+            result TEXT DEFAULT 'Pending',
+            hit_rate REAL
+        )
+    ''')
+
+
+def _add_value_columns(conn):
+    # Older databases have one, both or neither of these
+    existing = _columns(conn, 'predictions')
+    for column in ('actual', 'final_value'):
+        if column not in existing:
+            conn.execute(f'ALTER TABLE predictions ADD COLUMN {column} REAL')
+
+
+def _unique_bets(conn):
+    """Drops duplicate bets, keeping settled rows over pending ones, then the oldest"""
+    key = ', '.join(BET_KEY)
+    conn.execute(f'''
+        DELETE FROM predictions
+        WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY {key}
+                    ORDER BY result = 'Pending', actual IS NULL, id
+                ) AS rank
+                FROM predictions
+            )
+            WHERE rank = 1
+        )
+    ''')
+    conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_predictions_bet ON predictions ({key})')
+
+
+def _access_indexes(conn):
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_predictions_date_result ON predictions (date, result)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_predictions_result ON predictions (result)')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_predictions_player_market
+        ON predictions (player, market, date, result)
+    ''')
+
+
+def _change_tracking(conn):
+    """
+    Stamps every insert and update with the next value of a database-wide
+    change counter and leaves a tombstone for every delete, so readers can
+    fetch only what changed since the counter value they last saw.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS change_counter (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS deleted_predictions (
+            id INTEGER PRIMARY KEY,
+            deleted_at INTEGER NOT NULL
+        )
+    ''')
+    if 'updated_at' not in _columns(conn, 'predictions'):
+        conn.execute('ALTER TABLE predictions ADD COLUMN updated_at INTEGER NOT NULL DEFAULT 0')
+    conn.execute('UPDATE predictions SET updated_at = id')
+    conn.execute('INSERT OR REPLACE INTO change_counter (id, value) SELECT 1, COALESCE(MAX(id), 0) FROM predictions')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_predictions_updated_at ON predictions (updated_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_deleted_predictions_at ON deleted_predictions (deleted_at)')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS predictions_stamp_insert AFTER INSERT ON predictions
+        BEGIN
+            UPDATE change_counter SET value = value + 1 WHERE id = 1;
+            UPDATE predictions SET updated_at = (SELECT value FROM change_counter WHERE id = 1)
+            WHERE id = NEW.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS predictions_stamp_update AFTER UPDATE ON predictions
+        WHEN NEW.updated_at IS OLD.updated_at
+        BEGIN
+            UPDATE change_counter SET value = value + 1 WHERE id = 1;
+            UPDATE predictions SET updated_at = (SELECT value FROM change_counter WHERE id = 1)
+            WHERE id = NEW.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS predictions_tombstone AFTER DELETE ON predictions
+        BEGIN
+            UPDATE change_counter SET value = value + 1 WHERE id = 1;
+            INSERT OR REPLACE INTO deleted_predictions (id, deleted_at)
+            VALUES (OLD.id, (SELECT value FROM change_counter WHERE id = 1));
+        END
+    ''')
+
+
+def _season_tables(conn):
+    # Partitions themselves are created by season_archive as seasons are archived
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS archived_seasons (
+            season INTEGER PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            first_date TEXT,
+            last_date TEXT,
+            bets INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS season_summary (
+            season INTEGER,
+            market TEXT,
+            bets INTEGER,
+            hits INTEGER,
+            misses INTEGER,
+            avg_hit_rate REAL,
+            PRIMARY KEY (season, market)
+        )
+    ''')
+
+
+def _performance_rollups(conn):
+    import rollups
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS performance_rollup (
+            dimension TEXT,
+            key TEXT,
+            bets INTEGER NOT NULL DEFAULT 0,
+            hits INTEGER NOT NULL DEFAULT 0,
+            misses INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, key)
+        )
+    ''')
+    conn.execute('DELETE FROM performance_rollup')
+    rollups.accumulate(conn)
+    for (table,) in conn.execute('SELECT table_name FROM archived_seasons').fetchall():
+        rollups.accumulate(conn, table)
+    for statement in rollups.trigger_statements():
+        conn.execute(statement)
+
+
+def _rollup_key_changes(conn):
+    # The old triggers only watched result, so rollups drifted when a settled bet's keys changed
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'rollup_%'").fetchall():
+        conn.execute(f'DROP TRIGGER {name}')
+    _performance_rollups(conn)
+
+
+def _feature_columns(conn):
+    existing = _columns(conn, 'predictions')
+    for column, kind in FEATURE_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f'ALTER TABLE predictions ADD COLUMN {column} {kind}')
+
+
+def _data_versions(conn):
+    # 'predictions' reuses change_counter; other channels are bumped by their writers
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            channel TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO data_versions (channel, version) VALUES ('stats', 0)")
+
+
+MIGRATIONS = [
+    (1, 'baseline predictions table', _create_predictions),
+    (2, 'actual and final_value columns', _add_value_columns),
+    (3, 'one row per tracked bet', _unique_bets),
+    (4, 'indexes for date, result and player lookups', _access_indexes),
+    (5, 'change counter and delete tombstones', _change_tracking),
+    (6, 'season archive registry and summaries', _season_tables),
+    (7, 'performance rollups maintained by triggers', _performance_rollups),
+    (8, 'prediction-time feature columns', _feature_columns),
+    (9, 'data version channels for change polling', _data_versions),
+    (10, 'rollups follow changes to settled bets', _rollup_key_changes),
+]
+
+_migrated = set()  # database paths already brought up to date by this process
+
+
+def current_version(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT
+        )
+    ''')
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def migrate(path=None):
+    """
+    Applies every pending migration and returns the resulting schema version.
+    Only the first call per database in a process touches the database.
+    """
+    path = path or DB_PATH
+    if path in _migrated:
+        return MIGRATIONS[-1][0]
+
+    with transaction(path) as conn:
+        version = current_version(conn)
+
+    for number, description, apply in MIGRATIONS:
+        if number <= version:
+            continue
+        with transaction(path) as conn:
+            # Another process may have got here first
+            if current_version(conn) >= number:
+                continue
+            apply(conn)
+            conn.execute(
+                'INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                (number, description, datetime.now().isoformat(timespec='seconds'))
+            )
+
+    _migrated.add(path)
+    return MIGRATIONS[-1][0]
+
+
+if __name__ == "__main__":
+    print(f"predictions.db is at schema version {migrate()}")
@@ -0,0 +1,129 @@
+"""
+Versioned, persisted models.
+
+Each fit is saved as models/<name>/vNNNN.joblib with a vNNNN.json beside
+it recording the feature list, a hash of the training data and the fit's
+metrics, plus optionally the reference columns of its training rows
+(vNNNN.reference.parquet) for computing features on new data with the
+training set's statistics. fetch_or_train() loads the latest version when it was trained on
+the same features and data, and only fits (and saves) a new version when
+either changed, so scoring a slate doesn't pay for a full fit.
+
+    python model_registry.py list slate_forest
+"""
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import joblib
+import pandas as pd
+
+MODEL_DIR = os.environ.get('MODEL_DIR', 'models')
+
+
+def data_hash(X, y):
+    """Hash of the training rows and labels, independent of their index"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(X.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(pd.Series(y), index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _model_dir(name):
+    return os.path.join(MODEL_DIR, name)
+
+
+def versions(name):
+    """Metadata of every saved version of `name`, oldest first"""
+    directory = _model_dir(name)
+    if not os.path.isdir(directory):
+        return []
+    entries = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.json'):
+            with open(os.path.join(directory, filename)) as f:
+                entries.append(json.load(f))
+    return entries
+
+
+def latest(name):
+    saved = versions(name)
+    return saved[-1] if saved else None
+
+
+def latest_compatible(name, features):
+    """Metadata of the latest version of `name` trained on `features`, or None"""
+    compatible = [entry for entry in versions(name) if entry['features'] == list(features)]
+    return compatible[-1] if compatible else None
+
+
+def save_model(name, model, features, digest, metrics, reference=None):
+    """Saves a fitted model as the next version of `name` and returns its metadata"""
+    directory = _model_dir(name)
+    os.makedirs(directory, exist_ok=True)
+    previous = latest(name)
+    metadata = {
+        'name': name,
+        'version': previous['version'] + 1 if previous else 1,
+        'features': list(features),
+        'data_hash': digest,
+        'metrics': metrics,
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    stem = os.path.join(directory, f"v{metadata['version']:04d}")
+    joblib.dump(model, f'{stem}.joblib')
+    if reference is not None:
+        reference.to_parquet(f'{stem}.reference.parquet', index=False)
+    # Metadata last: a version only exists once its model is on disk
+    with open(f'{stem}.json', 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+
+def load_model(name, version=None):
+    """Returns (model, metadata) for `version` of `name`, the latest by default"""
+    metadata = latest(name) if version is None else next(
+        (entry for entry in versions(name) if entry['version'] == version), None
+    )
+    if metadata is None:
+        raise FileNotFoundError(f"No saved model {name!r}" + (f" version {version}" if version else ''))
+    model = joblib.load(os.path.join(_model_dir(name), f"v{metadata['version']:04d}.joblib"))
+    return model, metadata
+
+
+def load_reference(name, version):
+    """The reference rows saved with `version` of `name`, or None"""
+    path = os.path.join(_model_dir(name), f"v{version:04d}.reference.parquet")
+    return pd.read_parquet(path) if os.path.exists(path) else None
+
+
+def fetch_or_train(name, features, X, y, train, retrain=False, reference=None):
+    """
+    Returns (model, metadata), reusing the latest saved version when it
+    was trained on the same `features` and rows. Otherwise calls
+    `train(X, y)`, which returns (model, metrics), and saves the result
+    along with `reference`.
+    """
+    X = X[list(features)]
+    digest = data_hash(X, y)
+    current = latest(name)
+    if (not retrain and current is not None
+            and current['features'] == list(features) and current['data_hash'] == digest):
+        return load_model(name, current['version'])
+    model, metrics = train(X, y)
+    return model, save_model(name, model, features, digest, metrics, reference)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect saved model versions")
+    parser.add_argument('command', choices=['list'])
+    parser.add_argument('name')
+    args = parser.parse_args()
+
+    for entry in versions(args.name):
+        metrics = ', '.join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                            for key, value in entry['metrics'].items())
+        print(f"v{entry['version']:04d}  {entry['trained_at']}  {len(entry['features'])} features  {metrics}")
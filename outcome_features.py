@@ -0,0 +1,96 @@
+"""
+Streak and form features from the "Last 20 Outcomes" strings, for a whole
+slate at once.
+
+Each outcome string ('0' miss, '1' hit, oldest game first) is packed into a
+uint32 where bit 0 is the most recent game, plus the number of games it
+covers. Every feature is then a handful of NumPy shifts, masks and
+popcounts over the packed column instead of a Python loop per prop.
+"""
+import numpy as np
+import pandas as pd
+
+MAX_GAMES = 20
+TREND_WEIGHTS = [2.5, 2.0, 1.5, 1.2, 1.0]  # oldest to newest of the last five games
+STREAK_DECAY = 1.1
+
+_PLACES = np.uint32(1) << np.arange(MAX_GAMES - 1, -1, -1, dtype=np.uint32)
+
+
+def encode_outcomes(outcomes):
+    """
+    Packs a Series of outcome strings into (bits, lengths) arrays. Anything
+    but '0'/'1' is ignored and missing strings encode as zero games.
+    """
+    text = (pd.Series(outcomes, dtype=object).fillna('').astype(str)
+            .str.replace(r'[^01]', '', regex=True).str[-MAX_GAMES:])
+    lengths = text.str.len().to_numpy(dtype=np.uint32)
+    chars = np.frombuffer(text.str.rjust(MAX_GAMES, '0').str.cat().encode(), dtype=np.uint8)
+    hits = chars.reshape(-1, MAX_GAMES) == ord('1')
+    return (hits * _PLACES).sum(axis=1, dtype=np.uint32), lengths
+
+
+def popcount(bits):
+    """Number of set bits in each uint32"""
+    x = np.asarray(bits, dtype=np.uint32)
+    x = x - ((x >> 1) & 0x55555555)
+    x = (x & 0x33333333) + ((x >> 2) & 0x33333333)
+    x = (x + (x >> 4)) & 0x0F0F0F0F
+    return (x * np.uint32(0x01010101)) >> 24
+
+
+def _low_mask(k):
+    return (np.uint32(1) << np.asarray(k, dtype=np.uint32)) - np.uint32(1)
+
+
+def hits_in_last(bits, k):
+    """Hits in the most recent `k` games"""
+    return popcount(np.asarray(bits, dtype=np.uint32) & _low_mask(k))
+
+
+def volatility(bits, lengths):
+    """Hit/miss changes between consecutive games, as a percentage of 19"""
+    bits = np.asarray(bits, dtype=np.uint32)
+    pairs = _low_mask(np.maximum(np.asarray(lengths, dtype=np.int64) - 1, 0))
+    return popcount((bits ^ (bits >> 1)) & pairs) / 19 * 100
+
+
+def unpack(bits, games=MAX_GAMES):
+    """(n, games) 0/1 matrix of the most recent `games`, most recent first"""
+    shifts = np.arange(games, dtype=np.uint32)
+    return ((np.asarray(bits, dtype=np.uint32)[:, None] >> shifts) & 1).astype(np.int64)
+
+
+def streak_quality(bits):
+    """Hits weighted by STREAK_DECAY ** games ago"""
+    weights = STREAK_DECAY ** np.arange(MAX_GAMES)
+    return unpack(bits) @ weights
+
+
+def recent_trend(bits, lengths):
+    """
+    Hits in the last five games weighted by TREND_WEIGHTS, as a percentage
+    of 8. With fewer than five games the oldest weights are used first.
+    """
+    weights = np.zeros((len(TREND_WEIGHTS) + 1, len(TREND_WEIGHTS)))
+    for games in range(1, len(TREND_WEIGHTS) + 1):
+        weights[games, :games] = TREND_WEIGHTS[:games][::-1]
+    recent = np.minimum(np.asarray(lengths), len(TREND_WEIGHTS))
+    last = unpack(bits, len(TREND_WEIGHTS))
+    return (last * weights[recent]).sum(axis=1) / 8 * 100
+
+
+def longest_streak(bits):
+    """Longest run of consecutive hits"""
+    x = np.asarray(bits, dtype=np.uint32).copy()
+    streak = np.zeros(len(x), dtype=np.int64)
+    while x.any():
+        streak += x != 0
+        x &= x >> 1
+    return streak
+
+
+def outcome_list(bits, length):
+    """One prop's outcomes as a list of 0/1, oldest game first"""
+    return [int(bits) >> shift & 1 for shift in range(int(length) - 1, -1, -1)]
+
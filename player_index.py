@@ -0,0 +1,167 @@
+"""
+Maps PrizePicks player names to ESPN athlete ids.
+
+Names are normalized (accents, punctuation and generational suffixes
+removed) and stored in the `player_ids` table, so box-score lookups are a
+dict hit on athlete id rather than a substring scan over every athlete.
+"""
+import re
+import unicodedata
+from datetime import datetime
+
+import requests
+
+from database import connection
+from espn_api import get_scoreboard, get_roster, map_concurrent
+
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+# (athlete_id, display_name, team) tuples already written by this process
+_indexed = set()
+
+
+def normalize_name(name):
+    """
+    Normalizes a player name: "Kelly Oubre Jr." -> "kelly oubre",
+    "Nikola Jokić" -> "nikola jokic", "De'Aaron Fox" -> "deaaron fox"
+    """
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = re.sub(r"['’.]", '', text)
+    text = re.sub(r'[^a-z0-9]+', ' ', text)
+    parts = text.split()
+    while len(parts) > 1 and parts[-1] in NAME_SUFFIXES:
+        parts.pop()
+    return ' '.join(parts)
+
+
+def ensure_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_ids (
+            normalized_name TEXT NOT NULL,
+            athlete_id TEXT NOT NULL,
+            display_name TEXT,
+            team TEXT,
+            updated_at TEXT,
+            PRIMARY KEY (normalized_name, athlete_id)
+        )
+    ''')
+
+
+def index_athletes(conn, athletes):
+    """
+    Upserts (athlete_id, display_name, team) tuples into the index
+    """
+    now = datetime.now().isoformat(timespec='seconds')
+    fresh = {
+        (str(athlete_id), name, team)
+        for athlete_id, name, team in athletes
+        if athlete_id and name
+    } - _indexed
+    rows = [(normalize_name(name), athlete_id, name, team, now) for athlete_id, name, team in fresh]
+    ensure_table(conn)
+    if not rows:
+        return 0
+    with conn:
+        conn.executemany('''
+            INSERT INTO player_ids (normalized_name, athlete_id, display_name, team, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (normalized_name, athlete_id)
+            DO UPDATE SET display_name = excluded.display_name,
+                          team = excluded.team,
+                          updated_at = excluded.updated_at
+        ''', rows)
+    _indexed.update(fresh)
+    return len(rows)
+
+
+def athletes_from_roster(roster):
+    team = roster.get('team', {}).get('abbreviation')
+    return [(athlete.get('id'), athlete.get('displayName'), team)
+            for athlete in roster.get('athletes', [])]
+
+
+def build_index(game_date=None):
+    """
+    Indexes the rosters of every team on the scoreboard for `game_date`
+    """
+    scoreboard = get_scoreboard(game_date)
+    team_ids = {
+        competitor['team']['id']
+        for event in scoreboard.get('events', [])
+        for competition in event.get('competitions', [])
+        for competitor in competition.get('competitors', [])
+        if competitor.get('team', {}).get('id')
+    }
+
+    def fetch(team_id):
+        try:
+            return athletes_from_roster(get_roster(team_id))
+        except (requests.exceptions.RequestException, ValueError):
+            return []
+
+    athletes = [athlete for roster in map_concurrent(fetch, team_ids) for athlete in roster]
+    with connection() as conn:
+        return index_athletes(conn, athletes)
+
+
+def resolve_players(conn, names, active_ids=None):
+    """
+    Resolves player names to athlete ids.
+
+    Returns {'resolved': {name: athlete_id}, 'unresolved': [name, ...],
+    'ambiguous': {name: [athlete_id, ...]}}. When a name matches several
+    athletes but only one of them is in `active_ids` (e.g. players in
+    tonight's box scores), that one is used.
+    """
+    ensure_table(conn)
+    names = list(dict.fromkeys(names))
+    keys = {name: normalize_name(name) for name in names}
+    candidates = {}
+    unique_keys = list(set(keys.values()))
+    # Stay under SQLite's bound-parameter limit
+    for start in range(0, len(unique_keys), 500):
+        chunk = unique_keys[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        for key, athlete_id in conn.execute(
+            f'SELECT normalized_name, athlete_id FROM player_ids WHERE normalized_name IN ({placeholders})',
+            chunk
+        ):
+            candidates.setdefault(key, []).append(athlete_id)
+
+    report = {'resolved': {}, 'unresolved': [], 'ambiguous': {}}
+    for name in names:
+        ids = candidates.get(keys[name], [])
+        if active_ids is not None and len(ids) > 1:
+            active = [athlete_id for athlete_id in ids if athlete_id in active_ids]
+            if len(active) == 1:
+                ids = active
+        if len(ids) == 1:
+            report['resolved'][name] = ids[0]
+        elif ids:
+            report['ambiguous'][name] = sorted(ids)
+        else:
+            report['unresolved'].append(name)
+    return report
+
+
+def lookup_players(names, active_ids=None):
+    """Same as resolve_players, on its own connection"""
+    with connection() as conn:
+        return resolve_players(conn, names, active_ids)
+
+
+if __name__ == "__main__":
+    import sys
+    game_date = sys.argv[1] if len(sys.argv) > 1 else None
+    print(f"Indexed {build_index(game_date)} roster entries")
+
+    with connection() as conn:
+        names = [row[0] for row in conn.execute("SELECT DISTINCT player FROM predictions WHERE result = 'Pending'")]
+        report = resolve_players(conn, names)
+
+    print(f"Resolved {len(report['resolved'])} of {len(names)} pending players")
+    for name in report['unresolved']:
+        print(f"  Unresolved: {name}")
+    for name, ids in report['ambiguous'].items():
+        print(f"  Ambiguous: {name} -> {', '.join(ids)}")
@@ -0,0 +1,103 @@
+"""
+Decides when the stats collector should next look at each game.
+
+Games that have not tipped off are left alone until their start time, live
+games are polled faster in the 4th quarter and overtime of close games and
+slower at halftime or in blowouts, and a game is polled exactly once more
+after it goes final, then never again.
+"""
+from datetime import datetime, timedelta, timezone
+
+LIVE_INTERVAL = 60
+CLUTCH_INTERVAL = 15
+BLOWOUT_INTERVAL = 120
+HALFTIME_INTERVAL = 300
+DELAYED_START_INTERVAL = 120
+IDLE_INTERVAL = 30 * 60
+MIN_SLEEP = 5
+
+BLOWOUT_MARGIN = 20
+
+
+def parse_start_time(value):
+    """Parses ESPN's '2025-01-29T00:00Z' start times into aware UTC datetimes"""
+    if not value:
+        return None
+    for fmt in ('%Y-%m-%dT%H:%M%z', '%Y-%m-%dT%H:%M:%S%z'):
+        try:
+            return datetime.strptime(value, fmt).astimezone(timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+def live_interval(game):
+    """Seconds between polls of a game that is in progress"""
+    period = game.get('period') or 0
+    margin = abs((game.get('home_score') or 0) - (game.get('away_score') or 0))
+    clock = str(game.get('clock', ''))
+
+    if period == 2 and clock in ('0.0', '0:00'):
+        return HALFTIME_INTERVAL
+    if margin >= BLOWOUT_MARGIN:
+        return BLOWOUT_INTERVAL
+    if period >= 4:
+        return CLUTCH_INTERVAL
+    return LIVE_INTERVAL
+
+
+def next_poll_at(game, last_poll, now):
+    """
+    Returns when `game` should next be polled, or None once it needs no more polls.
+
+    `last_poll` is the (time, state) recorded the last time its box score was
+    fetched, or None if it never has been.
+    """
+    state = game.get('state')
+    if state == 'post':
+        if last_poll is not None and last_poll[1] == 'post':
+            return None
+        return now
+    if state == 'in':
+        if last_poll is None:
+            return now
+        return last_poll[0] + timedelta(seconds=live_interval(game))
+
+    start = parse_start_time(game.get('start_time'))
+    if start is None or start <= now:
+        # Tip-off is late; check the scoreboard again shortly
+        return now + timedelta(seconds=DELAYED_START_INTERVAL)
+    return start
+
+
+def due_games(games, last_polls, now):
+    """Ids of live or just-finished games whose box scores should be fetched now"""
+    due = []
+    for game in games:
+        if game.get('state') not in ('in', 'post'):
+            continue
+        poll_at = next_poll_at(game, last_polls.get(game['game_id']), now)
+        if poll_at is not None and poll_at <= now:
+            due.append(game['game_id'])
+    return due
+
+
+def seconds_until_next_poll(games, last_polls, now):
+    """How long the collector can sleep before any game needs attention"""
+    upcoming = [
+        poll_at
+        for game in games
+        for poll_at in [next_poll_at(game, last_polls.get(game['game_id']), now)]
+        if poll_at is not None
+    ]
+    if not upcoming:
+        return IDLE_INTERVAL
+    delay = (min(upcoming) - now).total_seconds()
+    return min(max(delay, MIN_SLEEP), IDLE_INTERVAL)
+
+
+def record_polls(last_polls, games, polled_ids, now):
+    """Remembers the time and state at which each polled game was fetched"""
+    states = {game['game_id']: game.get('state') for game in games}
+    for game_id in polled_ids:
+        last_polls[game_id] = (now, states.get(game_id))
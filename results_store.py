@@ -0,0 +1,187 @@
+"""
+Cached, incrementally refreshed view of the predictions table.
+
+The last snapshot is kept in memory together with the change counter value
+it was read at (see migrations._change_tracking). A refresh reads one
+counter row and, only if it moved, the rows stamped since then plus the ids
+deleted since then, so a rerun costs as much as the number of changes
+rather than the size of the table.
+
+Narrow reads that don't need the whole table go through query_results(),
+which pushes the filters down into indexed SQL and, for date ranges reaching
+into archived seasons, also reads the season_archive partitions they
+overlap. Bets are tracked in bulk through insert_predictions(), and model
+predictions with their features through record_predictions().
+"""
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from database import DB_PATH, connection, transaction
+from migrations import BET_KEY, FEATURE_COLUMNS, migrate
+from season_archive import partitions_for, prediction_columns
+
+REAL_COLUMNS = {'line', 'hit_rate', 'actual', 'final_value'} | {
+    column for column, kind in FEATURE_COLUMNS.items() if kind == 'REAL'
+}
+RECORD_COLUMNS = BET_KEY + ('result', 'hit_rate', 'actual') + tuple(FEATURE_COLUMNS)
+
+_snapshots = {}  # database path -> (change counter value, DataFrame indexed by id)
+_snapshots_lock = threading.Lock()
+
+
+def change_counter(conn):
+    """Returns the database-wide change counter value"""
+    row = conn.execute('SELECT value FROM change_counter WHERE id = 1').fetchone()
+    return row[0] if row else 0
+
+
+def _read(conn, sql, params=()):
+    # Keep `id` as a column for callers; the unnamed index mirrors it for merging
+    frame = pd.read_sql(sql, conn, params=params)
+    # All-NULL REAL columns would otherwise come back as object
+    for column in REAL_COLUMNS.intersection(frame.columns):
+        frame[column] = frame[column].astype('float64')
+    frame.index = frame['id'].to_numpy()
+    return frame
+
+
+def load_results(path=None):
+    """
+    Returns every tracked bet, refreshing the cached snapshot with whatever
+    changed since it was taken. The returned frame is shared between callers
+    and must not be modified in place.
+    """
+    path = path or DB_PATH
+    migrate(path)
+    with _snapshots_lock:
+        with connection(path) as conn:
+            counter = change_counter(conn)
+            cached = _snapshots.get(path)
+            if cached is not None and cached[0] == counter:
+                return cached[1]
+
+            if cached is None:
+                frame = _read(conn, 'SELECT * FROM predictions ORDER BY id')
+            else:
+                since, frame = cached
+                changed = _read(conn, 'SELECT * FROM predictions WHERE updated_at > ? ORDER BY id', (since,))
+                deleted = [row[0] for row in conn.execute(
+                    'SELECT id FROM deleted_predictions WHERE deleted_at > ?', (since,)
+                )]
+                stale = frame.index.intersection(deleted + changed.index.tolist())
+                frame = frame.drop(index=stale)
+                if len(changed):
+                    frame = pd.concat([frame, changed]).sort_index() if len(frame) else changed
+
+        _snapshots[path] = (counter, frame)
+    return frame
+
+
+def query_results(date=None, start=None, end=None, result=None, include_archived=None, path=None):
+    """
+    Reads only the bets matching the given filters: an exact `date`, an
+    inclusive `start`/`end` date range and/or a `result` such as 'Pending'.
+
+    Archived seasons overlapping the requested dates are included
+    automatically; an unbounded query reads them only with include_archived.
+    When any are read, an `archived_in` column names each row's partition
+    (None for bets still in predictions).
+    """
+    clauses, params = [], []
+    if date is not None:
+        clauses.append('date = ?')
+        params.append(date)
+    if start is not None:
+        clauses.append('date >= ?')
+        params.append(start)
+    if end is not None:
+        clauses.append('date <= ?')
+        params.append(end)
+    if result is not None:
+        clauses.append('result = ?')
+        params.append(result)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+    low = date if date is not None else start
+    high = date if date is not None else end
+    if include_archived is None:
+        include_archived = low is not None or high is not None
+
+    path = path or DB_PATH
+    migrate(path)
+    with connection(path) as conn:
+        tables = ['predictions']
+        if include_archived:
+            tables += partitions_for(conn, low, high)
+        if len(tables) == 1:
+            return _read(conn, f'SELECT * FROM predictions {where} ORDER BY id', params)
+        columns = ', '.join(name for name, _ in prediction_columns(conn))
+        sql = ' UNION ALL '.join(
+            f"SELECT {columns}, {'NULL' if table == 'predictions' else repr(table)} AS archived_in FROM {table} {where}"
+            for table in tables
+        )
+        return _read(conn, f'{sql} ORDER BY id', params * len(tables))
+
+
+def todays_results(path=None):
+    return query_results(date=datetime.now().strftime('%Y-%m-%d'), path=path)
+
+
+def _upsert_new(conn, sql, rows):
+    """Runs an upsert over `rows`; returns how many of them were new bets rather than updates"""
+    last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM predictions').fetchone()[0]
+    conn.executemany(sql, rows)
+    return conn.execute('SELECT COUNT(*) FROM predictions WHERE id > ?', (last_id,)).fetchone()[0]
+
+
+def insert_predictions(rows, path=None):
+    """
+    Tracks many bets in one transaction and returns how many were new.
+
+    `rows` are (date, player, market, line, prediction, hit_rate) tuples. A bet
+    that is already tracked only has its hit rate refreshed, and only while
+    it is still pending.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    path = path or DB_PATH
+    migrate(path)
+    with transaction(path) as conn:
+        return _upsert_new(conn, f'''
+            INSERT INTO predictions (date, player, market, line, prediction, hit_rate)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT ({', '.join(BET_KEY)}) DO UPDATE SET hit_rate = excluded.hit_rate
+            WHERE predictions.result = 'Pending' AND predictions.hit_rate IS NOT excluded.hit_rate
+        ''', rows)
+
+
+def record_predictions(records, path=None):
+    """
+    Writes prediction dicts keyed by RECORD_COLUMNS in one transaction and
+    returns how many were new.
+
+    A prediction that is already stored gets any missing features, actual or
+    settled result filled in; nothing that is already recorded is overwritten.
+    """
+    rows = [
+        tuple(record.get(column) for column in RECORD_COLUMNS[:len(BET_KEY)])
+        + (record.get('result') or 'Pending',)
+        + tuple(record.get(column) for column in RECORD_COLUMNS[len(BET_KEY) + 1:])
+        for record in records
+    ]
+    if not rows:
+        return 0
+    fill = [column for column in RECORD_COLUMNS if column not in BET_KEY and column != 'result']
+    path = path or DB_PATH
+    migrate(path)
+    with transaction(path) as conn:
+        return _upsert_new(conn, f'''
+            INSERT INTO predictions ({', '.join(RECORD_COLUMNS)})
+            VALUES ({', '.join('?' * len(RECORD_COLUMNS))})
+            ON CONFLICT ({', '.join(BET_KEY)}) DO UPDATE SET
+                {', '.join(f'{column} = COALESCE(predictions.{column}, excluded.{column})' for column in fill)},
+                result = CASE WHEN predictions.result = 'Pending' THEN excluded.result ELSE predictions.result END
+        ''', rows)
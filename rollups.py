@@ -0,0 +1,126 @@
+"""
+Materialized hit/miss totals for settled bets.
+
+`performance_rollup` holds one row per (dimension, key): the overall total,
+each day, market, player and 10-point confidence (weighted hit rate)
+bucket, and each market within a confidence bucket. Triggers created by migrations keep it current as bets move between
+Pending, Hit and Miss, are inserted already settled, have a column their
+rollup keys come from changed after settling, or are deleted, so
+readers get every aggregate as a single indexed lookup instead of scanning
+the bets. Rows moved into season archives keep counting.
+"""
+import pandas as pd
+
+from database import DB_PATH, connection
+from migrations import migrate
+
+
+def confidence_bucket(ref):
+    return (f"CASE WHEN {ref}.hit_rate IS NULL THEN 'unknown' "
+            f"ELSE printf('%d-%d', CAST({ref}.hit_rate / 10 AS INTEGER) * 10, "
+            f"CAST({ref}.hit_rate / 10 AS INTEGER) * 10 + 9) END")
+
+
+# Dimension -> SQL expression for its key, given a row alias
+DIMENSIONS = {
+    'total': lambda ref: "'all'",
+    'day': lambda ref: f'{ref}.date',
+    'market': lambda ref: f'{ref}.market',
+    'player': lambda ref: f'{ref}.player',
+    'confidence': confidence_bucket,
+    'market_confidence': lambda ref: f"{ref}.market || '|' || {confidence_bucket(ref)}",
+}
+
+# The result plus every column a DIMENSIONS key reads
+ROLLUP_COLUMNS = ('result', 'hit_rate', 'market', 'date', 'player')
+
+
+def _apply_row(ref, sign):
+    """Trigger statements adding (sign=1) or removing (sign=-1) one bet from every rollup"""
+    # An upsert rather than INSERT OR IGNORE: an outer upsert's conflict policy overrides OR IGNORE
+    return '\n'.join(
+        f"INSERT INTO performance_rollup (dimension, key, bets, hits, misses) "
+        f"VALUES ('{dimension}', {key(ref)}, {sign}, {sign} * ({ref}.result = 'Hit'), {sign} * ({ref}.result = 'Miss')) "
+        f"ON CONFLICT (dimension, key) DO UPDATE SET bets = bets + excluded.bets, "
+        f"hits = hits + excluded.hits, misses = misses + excluded.misses;"
+        for dimension, key in DIMENSIONS.items()
+    )
+
+
+def trigger_statements():
+    """CREATE TRIGGER statements that keep performance_rollup in step with predictions"""
+    settled = "IN ('Hit', 'Miss')"
+    columns = ', '.join(ROLLUP_COLUMNS)
+    changed = ' OR '.join(f'OLD.{column} IS NOT NEW.{column}' for column in ROLLUP_COLUMNS)
+    return [
+        f'''CREATE TRIGGER IF NOT EXISTS rollup_insert AFTER INSERT ON predictions
+            WHEN NEW.result {settled}
+            BEGIN
+            {_apply_row('NEW', 1)}
+            END''',
+        f'''CREATE TRIGGER IF NOT EXISTS rollup_unsettle AFTER UPDATE OF {columns} ON predictions
+            WHEN ({changed}) AND OLD.result {settled}
+            BEGIN
+            {_apply_row('OLD', -1)}
+            END''',
+        f'''CREATE TRIGGER IF NOT EXISTS rollup_settle AFTER UPDATE OF {columns} ON predictions
+            WHEN ({changed}) AND NEW.result {settled}
+            BEGIN
+            {_apply_row('NEW', 1)}
+            END''',
+        f'''CREATE TRIGGER IF NOT EXISTS rollup_delete AFTER DELETE ON predictions
+            WHEN OLD.result {settled}
+            BEGIN
+            {_apply_row('OLD', -1)}
+            END''',
+    ]
+
+
+def accumulate(conn, table='predictions', where='1', params=()):
+    """
+    Adds the settled bets of `table` matching `where` to every rollup in
+    bulk, e.g. to seed the rollups or to keep archived bets counted
+    """
+    for dimension, key in DIMENSIONS.items():
+        conn.execute(f'''
+            INSERT INTO performance_rollup (dimension, key, bets, hits, misses)
+            SELECT '{dimension}', {key('b')}, COUNT(*), SUM(b.result = 'Hit'), SUM(b.result = 'Miss')
+            FROM {table} AS b
+            WHERE b.result IN ('Hit', 'Miss') AND ({where})
+            GROUP BY 2
+            ON CONFLICT (dimension, key) DO UPDATE SET
+                bets = bets + excluded.bets,
+                hits = hits + excluded.hits,
+                misses = misses + excluded.misses
+        ''', params)
+
+
+def load_rollup(dimension, path=None):
+    """Returns one dimension's rollup as a DataFrame with a win_rate column"""
+    path = path or DB_PATH
+    migrate(path)
+    with connection(path) as conn:
+        frame = pd.read_sql(
+            'SELECT key, bets, hits, misses FROM performance_rollup WHERE dimension = ? AND bets > 0',
+            conn, params=(dimension,)
+        )
+    frame['win_rate'] = frame['hits'] / frame['bets'] * 100
+    return frame
+
+
+def bucket_floor(bucket):
+    """Lower bound of a confidence bucket such as '60-69', or -1 for 'unknown'"""
+    head = bucket.split('-')[0]
+    return int(head) if head.isdigit() else -1
+
+
+def totals(dimension='total', key='all', path=None):
+    """Returns (bets, hits, misses) for one rollup row"""
+    path = path or DB_PATH
+    migrate(path)
+    with connection(path) as conn:
+        row = conn.execute(
+            'SELECT bets, hits, misses FROM performance_rollup WHERE dimension = ? AND key = ?',
+            (dimension, key)
+        ).fetchone()
+    return row or (0, 0, 0)
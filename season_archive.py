@@ -0,0 +1,147 @@
+"""
+Seasonal archival of settled bets.
+
+Settled bets older than a horizon are moved out of the hot `predictions`
+table into one table per NBA season (predictions_season_2024 holds the
+2024-25 season), registered in `archived_seasons` with the dates they
+cover. Per-season, per-market totals stay in `season_summary`, so
+day-to-day reads only touch the hot table while results_store.query_results
+pulls in exactly the partitions a long date range overlaps.
+
+    python season_archive.py               # archive with the default horizon
+    python season_archive.py --days 60
+    python season_archive.py --summary
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+
+from database import DB_PATH, connection, transaction
+from migrations import migrate
+from rollups import accumulate
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get('PREDICTIONS_ARCHIVE_DAYS', 120))
+PARTITION_PREFIX = 'predictions_season_'
+SEASON_ROLLOVER_MONTH = 8  # the offseason; anything from August on belongs to the next season
+
+
+def season_of(game_date):
+    """Returns the year a game date's season started in, e.g. 2024 for 2025-01-29"""
+    year, month = int(game_date[:4]), int(game_date[5:7])
+    return year if month >= SEASON_ROLLOVER_MONTH else year - 1
+
+
+def season_label(season):
+    return f"{season}-{(season + 1) % 100:02d}"
+
+
+def season_bounds(season):
+    """First and last date belonging to a season"""
+    return f"{season}-{SEASON_ROLLOVER_MONTH:02d}-01", f"{season + 1}-{SEASON_ROLLOVER_MONTH - 1:02d}-31"
+
+
+def prediction_columns(conn):
+    """Returns (name, declared type) for every column of the hot table"""
+    return [(row[1], row[2]) for row in conn.execute('PRAGMA table_info(predictions)')]
+
+
+def _ensure_partition(conn, season):
+    table = f'{PARTITION_PREFIX}{season}'
+    columns = prediction_columns(conn)
+    definitions = ', '.join(
+        'id INTEGER PRIMARY KEY' if name == 'id' else f'{name} {kind}'
+        for name, kind in columns
+    )
+    conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({definitions})')
+    # Columns added to predictions after the partition was created
+    existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    for name, kind in columns:
+        if name not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {kind}')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_date ON {table} (date, result)')
+    return table
+
+
+def _refresh_season(conn, season, table):
+    conn.execute(f'''
+        INSERT OR REPLACE INTO archived_seasons (season, table_name, first_date, last_date, bets)
+        SELECT ?, ?, MIN(date), MAX(date), COUNT(*) FROM {table}
+    ''', (season, table))
+    conn.execute('DELETE FROM season_summary WHERE season = ?', (season,))
+    conn.execute(f'''
+        INSERT INTO season_summary (season, market, bets, hits, misses, avg_hit_rate)
+        SELECT ?, market, COUNT(*), SUM(result = 'Hit'), SUM(result = 'Miss'), AVG(hit_rate)
+        FROM {table}
+        GROUP BY market
+    ''', (season,))
+
+
+def archive_settled(days=None, today=None, path=None):
+    """
+    Moves settled bets dated more than `days` before `today` into their
+    season's partition in one transaction. Returns {season label: bets moved}.
+    """
+    path = path or DB_PATH
+    migrate(path)
+    days = ARCHIVE_AFTER_DAYS if days is None else days
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    cutoff = (datetime.strptime(today, '%Y-%m-%d') - timedelta(days=days)).strftime('%Y-%m-%d')
+
+    moved = {}
+    with transaction(path) as conn:
+        dates = [row[0] for row in conn.execute(
+            "SELECT DISTINCT date FROM predictions WHERE result != 'Pending' AND date < ?", (cutoff,)
+        )]
+        for season in sorted({season_of(game_date) for game_date in dates}):
+            table = _ensure_partition(conn, season)
+            first, last = season_bounds(season)
+            columns = ', '.join(name for name, _ in prediction_columns(conn))
+            where = "result != 'Pending' AND date < ? AND date BETWEEN ? AND ?"
+            params = (cutoff, first, last)
+            conn.execute(f'INSERT OR REPLACE INTO {table} ({columns}) SELECT {columns} FROM predictions WHERE {where}',
+                         params)
+            # The delete trigger takes these bets out of the rollups; archived bets still count
+            accumulate(conn, 'predictions', where, params)
+            moved[season_label(season)] = conn.execute(f'DELETE FROM predictions WHERE {where}', params).rowcount
+            _refresh_season(conn, season, table)
+    return moved
+
+
+def partitions_for(conn, start=None, end=None):
+    """Names of archive partitions holding any bet dated within [start, end]"""
+    return [row[0] for row in conn.execute('''
+        SELECT table_name FROM archived_seasons
+        WHERE bets > 0 AND (? IS NULL OR last_date >= ?) AND (? IS NULL OR first_date <= ?)
+        ORDER BY season
+    ''', (start, start, end, end))]
+
+
+def season_summary(path=None):
+    """Returns (season label, market, bets, hits, misses, avg hit rate) rows"""
+    path = path or DB_PATH
+    migrate(path)
+    with connection(path) as conn:
+        rows = conn.execute('''
+            SELECT season, market, bets, hits, misses, avg_hit_rate
+            FROM season_summary
+            ORDER BY season, market
+        ''').fetchall()
+    return [(season_label(season), *rest) for season, *rest in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive settled bets into per-season partitions")
+    parser.add_argument('--days', type=int, default=None,
+                        help=f"archive settled bets older than this many days (default {ARCHIVE_AFTER_DAYS})")
+    parser.add_argument('--summary', action='store_true', help="print archived season totals and exit")
+    args = parser.parse_args()
+
+    if not args.summary:
+        moved = archive_settled(args.days)
+        for label, count in moved.items():
+            print(f"Archived {count} bets from the {label} season")
+        if not moved:
+            print("Nothing to archive")
+
+    for label, market, bets, hits, misses, avg_hit_rate in season_summary():
+        print(f"{label}  {market:<22} {bets:>5} bets  {hits:>4} hits  {misses:>4} misses")
@@ -0,0 +1,237 @@
+"""
+Batch settlement of tracked bets.
+
+All pending bets for a date are settled in one pass: each game's box score is
+fetched once, every player's stat line is read out of it keyed by ESPN athlete
+id, and all results are written back in a single transaction.
+"""
+from datetime import datetime
+
+import numpy as np
+import requests
+
+from box_score import parse_box_score
+from database import connection
+from espn_api import get_scoreboard, get_summaries
+from markets import evaluate, is_known_market, stat_vector
+from migrations import migrate
+from player_index import index_athletes, resolve_players
+from write_queue import flush, submit_many
+
+
+def bet_result(actual, line, prediction='Over'):
+    if str(prediction).lower() == 'under':
+        return 'Hit' if actual < float(line) else 'Miss'
+    return 'Hit' if actual > float(line) else 'Miss'
+
+
+def game_stat_lines(summary, state, game_id):
+    """
+    Wraps one game's box score in the entry format used by collect_stat_lines.
+
+    Each entry's 'vector' is the athlete's row of the BoxScore matrix.
+    """
+    box_score = parse_box_score(summary)
+    return {
+        athlete_id: {'name': name, 'team': team, 'stats': stat_line, 'state': state,
+                     'game_id': game_id, 'vector': box_score.matrix[box_score.rows[athlete_id]]}
+        for athlete_id, (name, team, stat_line) in box_score.stat_lines().items()
+    }
+
+
+def collect_stat_lines(game_date=None, states=('in', 'post'), game_ids=None):
+    """
+    Fetches every game on `game_date` in one of `states` once and returns
+    {athlete_id: {'name': ..., 'team': ..., 'stats': stat_line, 'state': state, 'game_id': id}}
+
+    `game_ids` restricts the fetch to those games.
+    """
+    game_date = game_date or datetime.now().strftime('%Y-%m-%d')
+    players = {}
+    try:
+        scoreboard = get_scoreboard(game_date)
+    except (requests.exceptions.RequestException, ValueError):
+        return players
+
+    game_states = {}
+    for game in scoreboard.get('events', []):
+        state = game.get('status', {}).get('type', {}).get('state', '')
+        if state in states and (game_ids is None or game['id'] in game_ids):
+            game_states[game['id']] = state
+
+    summaries = get_summaries(game_states.items())
+    for game_id, summary in summaries.items():
+        players.update(game_stat_lines(summary, game_states[game_id], game_id))
+
+    return players
+
+
+def load_pending_bets(conn, game_date):
+    """Bets for `game_date` still waiting on a result or on their final actual"""
+    cursor = conn.execute("""
+        SELECT id, player, market, line, prediction
+        FROM predictions
+        WHERE date = ? AND (result = 'Pending' OR actual IS NULL)
+    """, (game_date,))
+    return cursor.fetchall()
+
+
+def resolve_stat_lines(conn, names, stat_lines):
+    """
+    Indexes the athletes seen in `stat_lines` and resolves `names` against them.
+
+    Returns the player_index report with an extra 'lines' map of
+    {name: stat line entry} for every resolved player who has a box score.
+    """
+    index_athletes(conn, [(athlete_id, entry['name'], entry['team'])
+                          for athlete_id, entry in stat_lines.items()])
+    report = resolve_players(conn, names, active_ids=set(stat_lines))
+    report['lines'] = {
+        name: stat_lines[athlete_id]
+        for name, athlete_id in report['resolved'].items()
+        if athlete_id in stat_lines
+    }
+    return report
+
+
+def player_stat_line(player_name, stat_lines):
+    """Returns one player's entry from collect_stat_lines output, or None"""
+    with connection() as conn:
+        return resolve_stat_lines(conn, [player_name], stat_lines)['lines'].get(player_name)
+
+
+def settle_bets(bets, player_lines):
+    """
+    Computes (result, actual, id) updates for `bets` against the
+    {player name: stat line entry} map from resolve_stat_lines.
+
+    Every matched bet is evaluated in one vectorized pass. Bets are only
+    settled once their game is final, except overs that have already cleared
+    the line, since box-score counts never go down; those get their result
+    now and an actual of None until the final box score. Returns the updates
+    and the sorted names of markets missing from the registry.
+    """
+    matched = [(bet, player_lines[bet[1]]) for bet in bets if bet[1] in player_lines]
+    unknown = sorted({bet[2] for bet, _ in matched if not is_known_market(bet[2])})
+    matched = [(bet, entry) for bet, entry in matched if is_known_market(bet[2])]
+    if not matched:
+        return [], unknown
+
+    rows = np.stack([entry['vector'] if 'vector' in entry else stat_vector(entry['stats'])
+                     for _, entry in matched])
+    actuals = evaluate(rows, [bet[2] for bet, _ in matched])
+
+    updates = []
+    for ((bet_id, player, market, line, prediction), entry), actual in zip(matched, actuals.tolist()):
+        actual = int(actual) if actual.is_integer() else round(actual, 2)
+        result = bet_result(actual, line, prediction)
+        if entry['state'] == 'post':
+            updates.append((result, actual, bet_id))
+        elif result == 'Hit' and str(prediction).lower() != 'under':
+            updates.append((result, None, bet_id))
+    return updates, unknown
+
+
+def settle_date(game_date=None, stat_lines=None):
+    """
+    Settles every pending bet for `game_date`, and records the final actual
+    of bets settled early while their game was in progress, handing all
+    updates to the write-behind queue as one batch so callers never wait on
+    the write lock.
+
+    Returns counts plus the names that could not be matched to an athlete,
+    and the collected stat lines so callers can reuse them for display.
+    """
+    game_date = game_date or datetime.now().strftime('%Y-%m-%d')
+    with connection() as conn:
+        bets = load_pending_bets(conn, game_date)
+        if bets and stat_lines is None:
+            stat_lines = collect_stat_lines(game_date)
+        report = resolve_stat_lines(conn, [bet[1] for bet in bets], stat_lines or {})
+        updates, unknown_markets = settle_bets(bets, report['lines'])
+    # Early-settled overs are only rewritten once their final actual is known
+    submit_many("""
+        UPDATE predictions
+        SET result = ?1, actual = ?2
+        WHERE id = ?3 AND (result = 'Pending' OR (actual IS NULL AND ?2 IS NOT NULL))
+    """, updates)
+
+    return {
+        'settled': len(updates),
+        'pending': len(bets) - len(updates),
+        'unresolved': report['unresolved'],
+        'ambiguous': report['ambiguous'],
+        'unknown_markets': unknown_markets,
+        'stat_lines': stat_lines or {},
+    }
+
+
+def backfill_actuals(before=None):
+    """
+    Settles legacy rows dated before `before` (today by default) that have
+    no `actual` recorded, one date at a time from the final box scores.
+
+    Rows already marked Hit/Miss get their actual filled in and their result
+    recomputed from it.
+    """
+    before = before or datetime.now().strftime('%Y-%m-%d')
+    summary = {'settled': 0, 'missing': 0, 'unresolved': set(), 'ambiguous': {}, 'unknown_markets': set()}
+    with connection() as conn:
+        rows = conn.execute("""
+            SELECT date, id, player, market, line, prediction
+            FROM predictions
+            WHERE actual IS NULL AND date < ?
+            ORDER BY date
+        """, (before,)).fetchall()
+
+        by_date = {}
+        for game_date, *bet in rows:
+            by_date.setdefault(game_date, []).append(tuple(bet))
+
+        for game_date, bets in by_date.items():
+            stat_lines = collect_stat_lines(game_date, states=('post',))
+            report = resolve_stat_lines(conn, [bet[1] for bet in bets], stat_lines)
+            updates, unknown_markets = settle_bets(bets, report['lines'])
+            submit_many("""
+                UPDATE predictions
+                SET result = ?, actual = ?
+                WHERE id = ?
+            """, updates)
+            summary['settled'] += len(updates)
+            summary['missing'] += len(bets) - len(updates)
+            summary['unresolved'].update(report['unresolved'])
+            summary['ambiguous'].update(report['ambiguous'])
+            summary['unknown_markets'].update(unknown_markets)
+
+    flush()
+    summary['unresolved'] = sorted(summary['unresolved'])
+    summary['unknown_markets'] = sorted(summary['unknown_markets'])
+    return summary
+
+
+def print_report(summary):
+    for market in summary['unknown_markets']:
+        print(f"  Unknown market (add it to markets.MARKETS): {market}")
+    for name in summary['unresolved']:
+        print(f"  Unresolved player: {name}")
+    for name, ids in summary['ambiguous'].items():
+        print(f"  Ambiguous player: {name} -> {', '.join(ids)}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Settle tracked bets from ESPN box scores")
+    parser.add_argument('date', nargs='?', help="game date (YYYY-MM-DD), today by default")
+    parser.add_argument('--backfill', action='store_true',
+                        help="settle every past bet that has no actual recorded")
+    args = parser.parse_args()
+
+    migrate()
+    if args.backfill:
+        summary = backfill_actuals()
+        print(f"Backfilled {summary['settled']} bets, {summary['missing']} could not be settled")
+    else:
+        summary = settle_date(args.date)
+        print(f"Settled {summary['settled']} bets, {summary['pending']} still pending")
+    print_report(summary)
@@ -0,0 +1,125 @@
+"""
+Typed, content-addressed ingest of PrizePicks slate CSVs.
+
+A slate is parsed once per distinct file content: hit rates become floats
+with the '-' placeholders as NaN, player/team/market columns become
+categoricals, '@' is stripped from team names and the last-20 outcome
+strings keep their leading zeros. The typed frame is cached in memory and
+as parquet/ingest/<sha256>.parquet, so reruns of the dashboard and other
+scripts reading the same slate skip CSV parsing entirely.
+
+    python slate_ingest.py rw-prizepicks-predictions-2025-01-29.csv
+"""
+import argparse
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from parquet_store import PARQUET_DIR
+
+INGEST_DIR = os.environ.get('SLATE_CACHE_DIR', os.path.join(PARQUET_DIR, 'ingest'))
+MEMORY_SLATES = 8  # most recently used typed slates kept in memory
+
+HIT_RATE_COLUMNS = [
+    'Weighted Hit Rate',
+    'Hit Rate: Last 5',
+    'Hit Rate: Last 10',
+    'Hit Rate: Last 20',
+    'Hit Rate: Season',
+    'Hit Rate: Previous Season',
+    'Hit Rate: Vs Opponent',
+]
+CATEGORY_COLUMNS = ['Player', 'Team', 'Opponent', 'Market Name']
+TEAM_COLUMNS = ['Team', 'Opponent']
+OUTCOMES_COLUMN = 'Hit Rate: Last 20 Outcomes'
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read_bytes(source):
+    """Raw bytes of a path, an uploaded file or anything with read()"""
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read()
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    return source.read()
+
+
+def parse_slate(data):
+    """Parses slate CSV bytes with the explicit schema"""
+    header = pd.read_csv(io.BytesIO(data), nrows=0).columns
+    hit_rates = [column for column in HIT_RATE_COLUMNS if column in header]
+    dtype = {column: 'float64' for column in hit_rates}
+    dtype.update({column: str for column in CATEGORY_COLUMNS + [OUTCOMES_COLUMN] if column in header})
+    if 'Line' in header:
+        dtype['Line'] = 'float64'
+
+    frame = pd.read_csv(io.BytesIO(data), dtype=dtype, na_values={column: ['-'] for column in hit_rates})
+    for column in TEAM_COLUMNS:
+        if column in frame.columns:
+            frame[column] = frame[column].str.replace('@', '')
+    for column in CATEGORY_COLUMNS:
+        if column in frame.columns:
+            frame[column] = frame[column].astype('category')
+    return frame
+
+
+def slate_path(digest):
+    return os.path.join(INGEST_DIR, f'{digest}.parquet')
+
+
+def _remember(digest, frame):
+    with _memory_lock:
+        _memory[digest] = frame
+        _memory.move_to_end(digest)
+        while len(_memory) > MEMORY_SLATES:
+            _memory.popitem(last=False)
+
+
+def load_slate(source):
+    """
+    Returns the typed slate for a CSV path, uploaded file or bytes, parsing
+    it only the first time its content is seen. Callers get their own copy.
+    """
+    data = _read_bytes(source)
+    digest = content_hash(data)
+    with _memory_lock:
+        frame = _memory.get(digest)
+        if frame is not None:
+            _memory.move_to_end(digest)
+    if frame is None:
+        path = slate_path(digest)
+        if os.path.exists(path):
+            frame = pd.read_parquet(path)
+        else:
+            frame = parse_slate(data)
+            os.makedirs(INGEST_DIR, exist_ok=True)
+            # Write under a temporary name so readers never see a partial file
+            partial = f'{path}.{os.getpid()}.tmp'
+            frame.to_parquet(partial, index=False)
+            os.replace(partial, path)
+        _remember(digest, frame)
+    return frame.copy()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse a PrizePicks slate CSV into the typed ingest cache")
+    parser.add_argument('paths', nargs='+')
+    args = parser.parse_args()
+
+    for path in args.paths:
+        data = _read_bytes(path)
+        frame = load_slate(data)
+        print(f"{path}: {len(frame)} rows -> {slate_path(content_hash(data))}")
@@ -0,0 +1,273 @@
+"""
+Standalone ESPN stats collector.
+
+Polls the scoreboard on its own schedule, writes normalized game and player
+stat snapshots into predictions.db and settles finished bets. The dashboard
+only reads these tables, so ESPN traffic no longer grows with the number of
+open browser sessions. When to poll each game is decided by poll_scheduler.
+
+    python stats_collector.py              # poll forever
+    python stats_collector.py --once       # single pass, e.g. from cron
+"""
+import argparse
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import requests
+
+from change_feed import bump
+from database import connection
+from espn_api import get_scoreboard
+from migrations import migrate
+from season_archive import archive_settled
+from settlement import collect_stat_lines, load_pending_bets, settle_date
+import poll_scheduler
+
+# Stat-line key -> player_stats column
+STAT_COLUMNS = {
+    'MIN': 'minutes',
+    'PTS': 'points',
+    'REB': 'rebounds',
+    'OREB': 'offensive_rebounds',
+    'DREB': 'defensive_rebounds',
+    'AST': 'assists',
+    'STL': 'steals',
+    'BLK': 'blocks',
+    'TO': 'turnovers',
+    'PF': 'fouls',
+    'FGM': 'fgm',
+    'FGA': 'fga',
+    '3PM': 'three_pm',
+    '3PA': 'three_pa',
+    'FTM': 'ftm',
+    'FTA': 'fta',
+    '+/-': 'plus_minus',
+}
+
+
+def ensure_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS games (
+            game_id TEXT PRIMARY KEY,
+            game_date TEXT,
+            name TEXT,
+            start_time TEXT,
+            state TEXT,
+            period INTEGER,
+            clock TEXT,
+            home_team TEXT,
+            away_team TEXT,
+            home_score INTEGER,
+            away_score INTEGER,
+            updated_at TEXT
+        )
+    ''')
+    stat_columns = ',\n            '.join(f'{column} INTEGER' for column in STAT_COLUMNS.values())
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS player_stats (
+            game_id TEXT,
+            athlete_id TEXT,
+            game_date TEXT,
+            player_name TEXT,
+            team TEXT,
+            state TEXT,
+            {stat_columns},
+            updated_at TEXT,
+            PRIMARY KEY (game_id, athlete_id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_player_stats_date ON player_stats (game_date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_games_date ON games (game_date)')
+
+
+def parse_games(scoreboard, game_date):
+    games = []
+    for event in scoreboard.get('events', []):
+        status = event.get('status', {})
+        competitors = (event.get('competitions') or [{}])[0].get('competitors', [])
+        sides = {c.get('homeAway'): c for c in competitors}
+        home, away = sides.get('home', {}), sides.get('away', {})
+        games.append({
+            'game_id': event['id'],
+            'game_date': game_date,
+            'name': event.get('name'),
+            'start_time': event.get('date'),
+            'state': status.get('type', {}).get('state', ''),
+            'period': status.get('period', 0),
+            'clock': status.get('displayClock', ''),
+            'home_team': home.get('team', {}).get('abbreviation'),
+            'away_team': away.get('team', {}).get('abbreviation'),
+            'home_score': int(home.get('score') or 0),
+            'away_score': int(away.get('score') or 0),
+        })
+    return games
+
+
+def store_snapshot(conn, game_date, games, stat_lines):
+    """
+    Upserts one poll's games and player stat lines in a single transaction,
+    bumping the 'stats' data version when any box score was written
+    """
+    now = datetime.now().isoformat(timespec='seconds')
+    game_rows = [(*game.values(), now) for game in games]
+    stat_keys = list(STAT_COLUMNS)
+    player_rows = [
+        (entry['game_id'], athlete_id, game_date, entry['name'], entry['team'], entry['state'],
+         *(entry['stats'].get(key, 0) for key in stat_keys), now)
+        for athlete_id, entry in stat_lines.items()
+    ]
+
+    ensure_tables(conn)
+    with conn:
+        conn.executemany(f'''
+            INSERT OR REPLACE INTO games
+            VALUES ({','.join('?' * 12)})
+        ''', game_rows)
+        conn.executemany(f'''
+            INSERT OR REPLACE INTO player_stats
+            VALUES ({','.join('?' * (7 + len(stat_keys)))})
+        ''', player_rows)
+        if player_rows:
+            bump(conn, 'stats')
+
+
+def poll_once(game_date=None, game_ids=None):
+    """
+    Takes one snapshot of `game_date`'s games and settles finished bets.
+
+    Box scores are only fetched for `game_ids` when given; the scoreboard
+    is always refreshed.
+    """
+    game_date = game_date or datetime.now().strftime('%Y-%m-%d')
+    scoreboard = get_scoreboard(game_date)
+    games = parse_games(scoreboard, game_date)
+    if game_ids is None:
+        stat_lines = collect_stat_lines(game_date)
+    elif game_ids:
+        stat_lines = collect_stat_lines(game_date, game_ids=set(game_ids))
+    else:
+        stat_lines = {}
+
+    with connection() as conn:
+        store_snapshot(conn, game_date, games, stat_lines)
+
+    settlement = settle_date(game_date, stat_lines)
+    return {'games': len(games), 'players': len(stat_lines), **settlement}
+
+
+def load_stat_lines(game_date=None):
+    """
+    Reads the latest player snapshots for `game_date` in the same
+    {athlete_id: entry} format that settlement.collect_stat_lines returns
+    """
+    game_date = game_date or datetime.now().strftime('%Y-%m-%d')
+    with connection() as conn:
+        ensure_tables(conn)
+        columns = ', '.join(STAT_COLUMNS.values())
+        rows = conn.execute(f'''
+            SELECT athlete_id, player_name, team, state, game_id, {columns}
+            FROM player_stats
+            WHERE game_date = ?
+        ''', (game_date,)).fetchall()
+
+    stat_keys = list(STAT_COLUMNS)
+    return {
+        athlete_id: {
+            'name': name,
+            'team': team,
+            'state': state,
+            'game_id': game_id,
+            'stats': dict(zip(stat_keys, values)),
+        }
+        for athlete_id, name, team, state, game_id, *values in rows
+    }
+
+
+def last_snapshot_time(game_date=None):
+    """Returns when the collector last wrote `game_date`'s games, or None"""
+    game_date = game_date or datetime.now().strftime('%Y-%m-%d')
+    with connection() as conn:
+        ensure_tables(conn)
+        row = conn.execute('SELECT MAX(updated_at) FROM games WHERE game_date = ?', (game_date,)).fetchone()
+    return datetime.fromisoformat(row[0]) if row[0] else None
+
+
+def day_finished(game_date, games, last_polls):
+    """
+    Whether a past `game_date` can stop being polled: every game has had its
+    final box score fetched, or none of the date's bets is still waiting
+    """
+    if all(last_polls.get(game['game_id'], (None, None))[1] == 'post' for game in games):
+        return True
+    with connection() as conn:
+        return not load_pending_bets(conn, game_date)
+
+
+def poll_date(game_date, last_polls):
+    """
+    One scheduled pass over `game_date`: fetches the box scores that are due
+    and returns (games, seconds until the date needs attention again)
+    """
+    games = parse_games(get_scoreboard(game_date), game_date)
+    now = datetime.now(timezone.utc)
+    due = poll_scheduler.due_games(games, last_polls, now)
+    summary = poll_once(game_date, due)
+    poll_scheduler.record_polls(last_polls, games, due, now)
+    delay = poll_scheduler.seconds_until_next_poll(games, last_polls, now)
+    print(f"[{datetime.now():%H:%M:%S}] {game_date}: {len(due)} of {summary['games']} games polled, "
+          f"settled {summary['settled']} bets, next poll in {delay:.0f}s")
+    return games, delay
+
+
+def run():
+    """
+    Polls forever: reads the scoreboard, fetches only the box scores
+    poll_scheduler says are due, then sleeps until a game needs attention.
+    After the local date rolls over the previous date keeps being polled
+    until its late games have gone final. Settled bets past the archive
+    horizon are moved out once a day.
+    """
+    # game date -> its last_polls; yesterday stays here until day_finished
+    polled_dates = {}
+    while True:
+        today = datetime.now().strftime('%Y-%m-%d')
+        if today not in polled_dates:
+            polled_dates[today] = {}
+            try:
+                for label, count in archive_settled(today=today).items():
+                    print(f"[{datetime.now():%H:%M:%S}] Archived {count} bets from the {label} season")
+            except sqlite3.Error as e:
+                print(f"[{datetime.now():%H:%M:%S}] Archiving failed: {e}")
+
+        delays = []
+        for game_date, last_polls in list(polled_dates.items()):
+            delay = poll_scheduler.DELAYED_START_INTERVAL
+            try:
+                games, delay = poll_date(game_date, last_polls)
+                if game_date != today and day_finished(game_date, games, last_polls):
+                    del polled_dates[game_date]
+                    print(f"[{datetime.now():%H:%M:%S}] {game_date} is final, no longer polled")
+                    continue
+            except (requests.exceptions.RequestException, ValueError, sqlite3.Error) as e:
+                print(f"[{datetime.now():%H:%M:%S}] Poll of {game_date} failed: {e}")
+            delays.append(delay)
+        time.sleep(min(delays, default=poll_scheduler.DELAYED_START_INTERVAL))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect ESPN game and player stats into predictions.db")
+    parser.add_argument('--once', action='store_true', help="take a single snapshot and exit")
+    parser.add_argument('--date', help="game date (YYYY-MM-DD) for --once, today by default")
+    args = parser.parse_args()
+
+    migrate()
+    if args.once:
+        summary = poll_once(args.date)
+        print(f"{summary['games']} games, {summary['players']} players, settled {summary['settled']} bets")
+    else:
+        run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Trains the bet model on settled results instead of on the slate's own
+outcome strings.
+
+Every settled bet in the predictions store that kept its prediction-time
+features (see analyze.store_predictions, dashboard.save_predictions and
+history_store) becomes one training row labelled by whether the stat went
+over the line: every feature measures how often the over hits, so an
+Under that hit is a negative example. Hyperparameters are chosen by
+walk-forward validation: each fold trains on the bets before a cutoff
+date, calibrates on the latest of those dates and is scored on the
+following dates only, so every reported metric is out of sample. Feature
+statistics taken across rows (hit rate fill means, Market_Success) are
+computed from each fold's training bets alone and applied to its test
+bets. The (parameters, fold) fits run in a process pool across all cores.
+The winning configuration is refit on everything and saved to the model
+registry as 'settled_forest', and is only retrained when settled data or
+the features change.
+
+    python train_model.py
+    python train_model.py --start 2024-10-22 --splits 8 --parquet
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import brier_score_loss, log_loss, roc_auc_score
+
+import parquet_store
+from feature_pipeline import FeaturePipeline
+from model_registry import fetch_or_train
+from predict import MODEL_FEATURES
+from results_store import query_results
+from slate_ingest import OUTCOMES_COLUMN
+
+MODEL_NAME = 'settled_forest'
+CALIBRATION_SHARE = 0.2  # latest share of each fold's training dates used for calibration
+CALIBRATION_BINS = 10
+
+# Predictions store column -> slate column
+STORE_COLUMNS = {
+    'date': 'Date',
+    'player': 'Player',
+    'market': 'Market Name',
+    'line': 'Line',
+    'hit_rate': 'Weighted Hit Rate',
+    'hit_rate_last_5': 'Hit Rate: Last 5',
+    'hit_rate_last_10': 'Hit Rate: Last 10',
+    'hit_rate_last_20': 'Hit Rate: Last 20',
+    'hit_rate_season': 'Hit Rate: Season',
+    'hit_rate_vs_opponent': 'Hit Rate: Vs Opponent',
+    'last_20_outcomes': OUTCOMES_COLUMN,
+}
+
+# The store doesn't capture the previous season's hit rate
+TRAINING_FEATURES = [name for name in MODEL_FEATURES if name != 'Hit Rate: Previous Season']
+
+PARAM_GRID = {
+    'n_estimators': [200, 400],
+    'max_depth': [6, 10, None],
+    'min_samples_leaf': [1, 5, 20],
+}
+
+
+class CalibratedForest:
+    """
+    A fitted forest whose hit probabilities are Platt-scaled on later bets.
+    Without a calibrator (single-outcome calibration data) it is the raw forest.
+    """
+
+    def __init__(self, forest, calibrator=None):
+        self.forest = forest
+        self.calibrator = calibrator
+        self.classes_ = np.array([False, True])
+
+    def predict_proba(self, X):
+        raw = _hit_probability(self.forest, X)
+        if self.calibrator is None:
+            return np.column_stack([1 - raw, raw])
+        return self.calibrator.predict_proba(raw.reshape(-1, 1))
+
+
+def _hit_probability(model, X):
+    probabilities = model.predict_proba(X)
+    if probabilities.shape[1] == 1:
+        return np.full(len(X), float(model.classes_[0]))
+    return probabilities[:, list(model.classes_).index(True)]
+
+
+def settled_training_set(start=None, end=None, from_parquet=False):
+    """
+    Settled bets with their prediction-time slate columns, oldest first,
+    as (slate, went-over labels, dates)
+    """
+    if from_parquet:
+        bets = parquet_store.load('predictions', list(STORE_COLUMNS) + ['prediction', 'result'], start, end)
+    else:
+        bets = query_results(start=start, end=end, include_archived=True)
+    bets = bets[bets['result'].isin(['Hit', 'Miss']) & bets['hit_rate_last_5'].notna()]
+    bets = bets.sort_values('date', kind='stable').reset_index(drop=True)
+
+    slate = bets[list(STORE_COLUMNS)].rename(columns=STORE_COLUMNS)
+    went_over = (bets['result'] == 'Hit') == (bets['prediction'] != 'Under')
+    return slate, went_over.to_numpy(), bets['date'].astype(str).to_numpy()
+
+
+def training_features(slate, reference=None):
+    """TRAINING_FEATURES of `slate` as a float array, statistics from `reference` (the slate itself by default)"""
+    features = FeaturePipeline(slate, reference).compute(TRAINING_FEATURES)[TRAINING_FEATURES]
+    return features.to_numpy(dtype=float)
+
+
+def fold_features(slate, train, test):
+    """(train, test) feature arrays of one fold, fitted on its training rows only"""
+    fit = slate.iloc[train]
+    return training_features(fit), training_features(slate.iloc[test], reference=fit)
+
+
+def walk_forward_splits(dates, n_splits):
+    """
+    (train, test) row indexes for `n_splits` expanding-window folds over
+    the distinct dates, so no fold trains on a day it is scored on
+    """
+    days = np.unique(dates)
+    if len(days) < n_splits + 1:
+        raise ValueError(f"Need at least {n_splits + 1} settled days for {n_splits} folds, have {len(days)}")
+    edges = np.linspace(0, len(days), n_splits + 2).astype(int)[1:]
+    return [
+        (np.flatnonzero(dates < days[cutoff]), np.flatnonzero(np.isin(dates, days[cutoff:stop])))
+        for cutoff, stop in zip(edges[:-1], edges[1:])
+    ]
+
+
+def fit_calibrated(params, X, y, dates):
+    """
+    Fits the forest on all but the latest CALIBRATION_SHARE of the dates
+    and a Platt scaler on those latest dates. With nothing usable to hold
+    out the forest is fit on every row and left uncalibrated.
+    """
+    days = np.unique(dates)
+    calibrate = np.isin(dates, days[-max(1, int(len(days) * CALIBRATION_SHARE)):])
+    fit = ~calibrate
+    held_out = fit.any() and len(np.unique(y[calibrate])) == 2
+    if not held_out:
+        fit = np.ones(len(y), dtype=bool)
+
+    forest = RandomForestClassifier(random_state=42, class_weight='balanced', n_jobs=1, **params)
+    forest.fit(X[fit], y[fit])
+    if not held_out:
+        # Too little history to hold any back; calibrating on the fit rows would only overfit
+        return CalibratedForest(forest)
+    calibrator = LogisticRegression()
+    calibrator.fit(_hit_probability(forest, X[calibrate]).reshape(-1, 1), y[calibrate])
+    return CalibratedForest(forest, calibrator)
+
+
+def expected_calibration_error(y, probability, bins=CALIBRATION_BINS):
+    """Bet-weighted gap between predicted and observed hit rates across probability bins"""
+    which = np.minimum((probability * bins).astype(int), bins - 1)
+    error = 0.0
+    for b in np.unique(which):
+        members = which == b
+        error += members.sum() * abs(probability[members].mean() - y[members].mean())
+    return error / len(y)
+
+
+def reliability_table(y, probability, bins=CALIBRATION_BINS):
+    which = np.minimum((probability * bins).astype(int), bins - 1)
+    table = pd.DataFrame({'bin': which, 'predicted': probability, 'observed': y})
+    table = table.groupby('bin').agg(bets=('observed', 'size'), predicted=('predicted', 'mean'),
+                                      observed=('observed', 'mean'))
+    table.index = [f"{b * 100 // bins}-{(b + 1) * 100 // bins}%" for b in table.index]
+    return table
+
+
+def out_of_sample_metrics(y, probability):
+    metrics = {
+        'bets': int(len(y)),
+        'hit_rate': float(y.mean()),
+        'log_loss': float(log_loss(y, probability, labels=[False, True])),
+        'brier': float(brier_score_loss(y, probability)),
+        'accuracy': float(((probability >= 0.5) == y).mean()),
+        'calibration_error': float(expected_calibration_error(y, probability)),
+    }
+    if len(np.unique(y)) == 2:
+        metrics['roc_auc'] = float(roc_auc_score(y, probability))
+    return metrics
+
+
+# Fold features shared with the pool's workers once instead of with every task
+_worker_data = {}
+
+
+def _init_worker(folds, y, dates):
+    _worker_data.update(folds=folds, y=y, dates=dates)
+
+
+def _evaluate(task):
+    """Fits one (parameters, fold) pair; returns the fold's test rows and their probabilities"""
+    params, fold = task
+    train, test, X_train, X_test = _worker_data['folds'][fold]
+    y, dates = _worker_data['y'], _worker_data['dates']
+    model = fit_calibrated(params, X_train, y[train], dates[train])
+    return test, model.predict_proba(X_test)[:, 1]
+
+
+def parameter_grid(grid=PARAM_GRID):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def search(slate, y, dates, n_splits=5, workers=None):
+    """
+    Walk-forward validates every PARAM_GRID combination in a process pool.
+    Returns ([(params, metrics, probabilities)] sorted by out-of-sample log
+    loss, scored), where `scored` are the rows that were ever test rows and
+    the probabilities are theirs.
+    """
+    workers = workers or os.cpu_count()
+    splits = walk_forward_splits(dates, n_splits)
+    folds = [(train, test, *fold_features(slate, train, test)) for train, test in splits]
+    scored = np.concatenate([test for _, test in splits])
+    candidates = parameter_grid()
+    tasks = [(params, fold) for params in candidates for fold in range(len(folds))]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(folds, y, dates)) as pool:
+        results = list(pool.map(_evaluate, tasks))
+
+    ranked = []
+    for n, params in enumerate(candidates):
+        probability = np.empty(len(y))
+        for test, fold_probability in results[n * len(splits):(n + 1) * len(splits)]:
+            probability[test] = fold_probability
+        ranked.append((params, out_of_sample_metrics(y[scored], probability[scored]), probability[scored]))
+    return sorted(ranked, key=lambda entry: entry[1]['log_loss']), scored
+
+
+def print_search(ranked, y_scored, top=10):
+    print("\n📐 WALK-FORWARD VALIDATION (out of sample)")
+    print("=========================================")
+    rows = [{**{k: str(v) for k, v in params.items()}, **{k: v for k, v in metrics.items() if k != 'bets'}}
+            for params, metrics, _ in ranked[:top]]
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f'{x:.4f}'))
+    best_params, best_metrics, best_probability = ranked[0]
+    print(f"\nBest: {best_params} on {best_metrics['bets']} out-of-sample bets")
+    print(reliability_table(y_scored, best_probability).to_string(float_format=lambda x: f'{x:.3f}'))
+
+
+def train(slate, y, dates, n_splits=5, workers=None):
+    """Searches the grid, then refits the best parameters on every settled bet"""
+    ranked, scored = search(slate, y, dates, n_splits, workers)
+    print_search(ranked, y[scored])
+    params, metrics, _ = ranked[0]
+    model = fit_calibrated(params, training_features(slate), y, dates)
+    return model, {**metrics, 'params': params, 'folds': n_splits}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and validate the bet model on settled results")
+    parser.add_argument('--start', help="first date (YYYY-MM-DD)")
+    parser.add_argument('--end', help="last date (YYYY-MM-DD)")
+    parser.add_argument('--splits', type=int, default=5, help="walk-forward folds")
+    parser.add_argument('--workers', type=int, help="worker processes (all cores by default)")
+    parser.add_argument('--parquet', action='store_true', help="read settled bets from the Parquet snapshot")
+    parser.add_argument('--retrain', action='store_true', help="search and refit even if nothing changed")
+    args = parser.parse_args()
+
+    # Through the module, so saved models unpickle as train_model.CalibratedForest rather than __main__'s
+    import train_model
+
+    slate, y, dates = settled_training_set(args.start, args.end, args.parquet)
+    print(f"{len(slate)} settled bets with prediction-time features over {len(np.unique(dates))} days")
+    # The registry keys on the full-data features; the folds recompute theirs from their own rows
+    X = FeaturePipeline(slate).compute(TRAINING_FEATURES)
+    model, metadata = fetch_or_train(
+        MODEL_NAME, TRAINING_FEATURES, X, pd.Series(y),
+        lambda X, y: train_model.train(slate, y.to_numpy(), dates, args.splits, args.workers),
+        retrain=args.retrain,
+    )
+    metrics = {k: v for k, v in metadata['metrics'].items() if k not in ('params', 'folds')}
+    print(f"\nModel {MODEL_NAME} v{metadata['version']}, params {metadata['metrics']['params']}")
+    print(', '.join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in metrics.items()))
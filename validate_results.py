@@ -1,73 +1,73 @@
-import pandas as pd
-import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
+from database import connection, transaction
+from espn_api import http_get, map_concurrent
+from markets import is_known_market, market_weights
+from migrations import migrate
+from rollups import totals
+from settlement import bet_result
 
 def get_game_stats(player_name, market):
+    weights = market_weights(market)
     formatted_name = player_name.lower().replace(' ', '-')
     url = f"https://www.espn.com/nba/player/gamelog/_/name/{formatted_name}/season/2024"
     headers = {'User-Agent': 'Mozilla/5.0'}
     
     try:
-        response = requests.get(url, headers=headers, timeout=3)
+        response = http_get(url, headers=headers, timeout=3)
         soup = BeautifulSoup(response.content, 'html.parser')
         # Get most recent game stats
         stats_table = soup.find('table', class_='Table')
         latest_game = stats_table.find_all('tr')[1]  # First row after header
         
-        stat_mapping = {
-            'Points': 'PTS',
-            'Rebounds': 'REB',
-            'Assists': 'AST',
-            'PTS+REB': ['PTS', 'REB'],
-            'PTS+AST': ['PTS', 'AST'],
-            'REB+AST': ['REB', 'AST'],
-            'PTS+REB+AST': ['PTS', 'REB', 'AST']
-        }
-        
-        return extract_stats(latest_game, stat_mapping[market])
+        return extract_stats(latest_game, weights)
     except:
         return None
 
-def extract_stats(game_row, stat_categories):
-    if isinstance(stat_categories, list):
-        total = 0
-        for cat in stat_categories:
-            total += float(game_row.find('td', {'data-stat': cat.lower()}).text)
-        return total
-    else:
-        return float(game_row.find('td', {'data-stat': stat_categories.lower()}).text)
+def extract_stats(game_row, weights):
+    total = 0
+    for column, weight in weights.items():
+        total += weight * float(game_row.find('td', {'data-stat': column.lower()}).text)
+    return total
 
-def update_results():
-    predictions = pd.read_csv('prediction_history.csv')
-    today_date = datetime.now().strftime('%Y-%m-%d')
-    pending_predictions = predictions[
-        (predictions['Date'] == today_date) & 
-        (predictions['Actual'].isnull())
-    ]
+def update_results(game_date=None):
+    game_date = game_date or datetime.now().strftime('%Y-%m-%d')
+    with connection() as conn:
+        pending_predictions = conn.execute(
+            "SELECT id, player, market, line, prediction FROM predictions WHERE date = ? AND actual IS NULL",
+            (game_date,)
+        ).fetchall()
     
     print("\n📊 UPDATING PREDICTION RESULTS")
     print("============================")
     
-    for _, pred in pending_predictions.iterrows():
-        actual_stat = get_game_stats(pred['Player'], pred['Market'])
-        if actual_stat:
-            predictions.loc[predictions.index == _, 'Actual'] = actual_stat
-            result = (actual_stat > float(pred['Line'])) if pred['Prediction'] == 'Over' else (actual_stat < float(pred['Line']))
-            predictions.loc[predictions.index == _, 'Result'] = result
+    unknown_markets = sorted({pred[2] for pred in pending_predictions if not is_known_market(pred[2])})
+    for market in unknown_markets:
+        print(f"⚠️ Unknown market (add it to markets.MARKETS): {market}")
+    pending_predictions = [pred for pred in pending_predictions if pred[2] not in unknown_markets]
+    
+    # Fetch every pending player's game log concurrently
+    actual_stats = map_concurrent(lambda pred: get_game_stats(pred[1], pred[2]), pending_predictions)
+    
+    updates = []
+    for (prediction_id, player, market, line, prediction), actual_stat in zip(pending_predictions, actual_stats):
+        if actual_stat is not None:
+            result = bet_result(actual_stat, line, prediction)
+            updates.append((actual_stat, result, prediction_id))
             
-            print(f"\nPlayer: {pred['Player']}")
-            print(f"Market: {pred['Market']} {pred['Line']}")
-            print(f"Prediction: {pred['Prediction']}")
+            print(f"\nPlayer: {player}")
+            print(f"Market: {market} {line}")
+            print(f"Prediction: {prediction}")
             print(f"Actual: {actual_stat}")
-            print(f"Result: {'✅ Correct' if result else '❌ Incorrect'}")
+            print(f"Result: {'✅ Correct' if result == 'Hit' else '❌ Incorrect'}")
     
-    predictions.to_csv('prediction_history.csv', index=False)
+    # Only the rows that changed are written
+    if updates:
+        with transaction() as conn:
+            conn.executemany("UPDATE predictions SET actual = ?, result = ? WHERE id = ?", updates)
     
     # Calculate and display accuracy metrics
-    results = predictions[predictions['Result'].notna()]
-    total_predictions = len(results)
-    correct_predictions = results['Result'].sum()
+    total_predictions, correct_predictions, _ = totals()
     accuracy = (correct_predictions / total_predictions * 100) if total_predictions > 0 else 0
     
     print("\n📈 OVERALL PERFORMANCE")
@@ -77,4 +77,5 @@ def update_results():
     print(f"Accuracy: {accuracy:.1f}%")
 
 if __name__ == "__main__":
+    migrate()
     update_results()
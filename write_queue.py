@@ -0,0 +1,120 @@
+"""
+Write-behind queue for predictions.db.
+
+Result and actual updates from render paths and background threads are
+handed to one writer thread instead of each taking the SQLite write lock.
+The writer batches whatever arrives within FLUSH_INTERVAL_MS (or until
+FLUSH_ROWS rows are waiting) into a single transaction, and anything still
+queued is written when the process exits. Callers never block on a write;
+call flush() when the next read has to see it.
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import database
+
+FLUSH_INTERVAL_MS = int(os.environ.get('WRITE_FLUSH_MS', 250))
+FLUSH_ROWS = int(os.environ.get('WRITE_FLUSH_ROWS', 500))
+SHUTDOWN_TIMEOUT = 10  # seconds to wait for queued writes at exit
+
+_pending = queue.Queue()  # (sql, rows, path) or (None, Event, None) for a flush
+_writer = None
+_writer_lock = threading.Lock()
+_stats = {'batches': 0, 'rows': 0, 'errors': 0}
+
+
+def _write(batch):
+    """Writes a batch in submission order, one transaction per database"""
+    by_path = {}
+    for sql, rows, path in batch:
+        statements = by_path.setdefault(path, [])
+        # Consecutive submissions of the same statement become one executemany
+        if statements and statements[-1][0] == sql:
+            statements[-1][1].extend(rows)
+        else:
+            statements.append((sql, list(rows)))
+
+    for path, statements in by_path.items():
+        try:
+            _execute(path, statements)
+        except sqlite3.Error:
+            # Retry statement by statement so one bad write doesn't drop the rest
+            for statement in statements:
+                try:
+                    _execute(path, [statement])
+                except sqlite3.Error as e:
+                    _stats['errors'] += 1
+                    print(f"Write-behind write failed ({len(statement[1])} rows): {e}")
+
+
+def _execute(path, statements):
+    with database.transaction(path) as conn:
+        for sql, rows in statements:
+            conn.executemany(sql, rows)
+    _stats['batches'] += 1
+    _stats['rows'] += sum(len(rows) for _, rows in statements)
+
+
+def _run():
+    while True:
+        item = _pending.get()
+        batch, waiters, rows = [], [], 0
+        deadline = time.monotonic() + FLUSH_INTERVAL_MS / 1000
+        while True:
+            if item[0] is None:
+                # A flush request writes everything queued ahead of it right away
+                waiters.append(item[1])
+                break
+            batch.append(item)
+            rows += len(item[1])
+            timeout = deadline - time.monotonic()
+            if rows >= FLUSH_ROWS or timeout <= 0:
+                break
+            try:
+                item = _pending.get(timeout=timeout)
+            except queue.Empty:
+                break
+        if batch:
+            _write(batch)
+        for event in waiters:
+            event.set()
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_run, name='write-behind', daemon=True)
+            _writer.start()
+
+
+def submit_many(sql, rows, path=None):
+    """Queues `sql` to be run once per parameter tuple in `rows`"""
+    rows = list(rows)
+    if rows:
+        _ensure_writer()
+        _pending.put((sql, rows, path or database.DB_PATH))
+
+
+def submit(sql, params=(), path=None):
+    submit_many(sql, [params], path)
+
+
+def flush(timeout=None):
+    """Blocks until everything submitted so far is written; False on timeout"""
+    if _writer is None:
+        return True
+    done = threading.Event()
+    _pending.put((None, done, None))
+    return done.wait(timeout)
+
+
+def queue_stats():
+    return {**_stats, 'queued': _pending.qsize()}
+
+
+atexit.register(flush, SHUTDOWN_TIMEOUT)